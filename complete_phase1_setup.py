@@ -4,54 +4,40 @@ Complete Phase 1 setup using direct database connection.
 Creates all tables and storage bucket for File Upload System.
 """
 
+import argparse
 import os
-import sys
 
-# Get environment variables
-SUPABASE_URL = os.getenv('SUPABASE_URL', 'https://jmaxcgoooguzmcnnanfb.supabase.co')
-SUPABASE_SERVICE_ROLE_KEY = os.getenv('SUPABASE_SERVICE_ROLE_KEY', '')
-SUPABASE_DB_URL = os.getenv('SUPABASE_DB_URL', '')
+from supabase_rest import SupabaseError, SupabaseRest
 
-if not SUPABASE_SERVICE_ROLE_KEY:
-    print("ERROR: SUPABASE_SERVICE_ROLE_KEY not found in environment")
-    sys.exit(1)
+DEFAULT_OUTPUT = '/tmp/phase1_setup.sql'
 
-import requests
-import json
-
-def create_tables_via_function():
+def create_tables_via_function(client, output_file=DEFAULT_OUTPUT):
     """Create tables by calling our setup edge function."""
     
     # First, let's try to create the storage bucket via API
     print("Creating storage bucket...")
-    bucket_response = requests.post(
-        f"{SUPABASE_URL}/storage/v1/bucket",
-        headers={
-            'Authorization': f'Bearer {SUPABASE_SERVICE_ROLE_KEY}',
-            'apikey': SUPABASE_SERVICE_ROLE_KEY,
-            'Content-Type': 'application/json',
-        },
-        json={
-            'id': 'documents',
-            'name': 'documents',
-            'public': False,
-            'file_size_limit': 104857600,
-            'allowed_mime_types': [
-                'application/pdf',
-                'text/plain',
-                'text/markdown',
-                'application/vnd.openxmlformats-officedocument.wordprocessingml.document'
-            ]
-        }
-    )
+    bucket = {
+        'id': 'documents',
+        'name': 'documents',
+        'public': False,
+        'file_size_limit': 104857600,
+        'allowed_mime_types': [
+            'application/pdf',
+            'text/plain',
+            'text/markdown',
+            'application/vnd.openxmlformats-officedocument.wordprocessingml.document'
+        ]
+    }
     
-    if bucket_response.status_code in [200, 201]:
+    try:
+        client.request('POST', 'storage/v1/bucket', body=bucket)
         print("✓ Storage bucket 'documents' created successfully")
-    elif bucket_response.status_code == 409:
-        print("✓ Storage bucket 'documents' already exists")
-    else:
-        print(f"✗ Failed to create storage bucket: {bucket_response.status_code}")
-        print(f"  Response: {bucket_response.text}")
+    except SupabaseError as e:
+        if e.status == 409:
+            print("✓ Storage bucket 'documents' already exists")
+        else:
+            print(f"✗ Failed to create storage bucket: {e.status}")
+            print(f"  Response: {e.body}")
     
     # Now create tables using PostgreSQL REST API
     tables_sql = [
@@ -175,7 +161,7 @@ def create_tables_via_function():
     # This is a workaround since we can't use the migration tool
     
     # Write SQL to file for manual execution
-    output_file = '/workspace/docs/phase1_setup.sql'
+    os.makedirs(os.path.dirname(output_file) or '.', exist_ok=True)
     with open(output_file, 'w') as f:
         f.write("-- Phase 1: File Upload System Database Setup\n")
         f.write("-- Execute this SQL in Supabase SQL Editor\n\n")
@@ -187,5 +173,11 @@ def create_tables_via_function():
     
     return True
 
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Create the documents bucket and write the Phase 1 SQL')
+    parser.add_argument('--output', default=DEFAULT_OUTPUT, help='where to write the SQL')
+    args = parser.parse_args(argv)
+    create_tables_via_function(SupabaseRest(), args.output)
+
 if __name__ == '__main__':
-    create_tables_via_function()
\ No newline at end of file
+    main()
\ No newline at end of file
@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+Binary memory-mapped store for the IDP training corpus.
+
+Layout (little-endian):
+    header   magic 'NTECORP1', version, field count, example count,
+             positions of the offsets, index and domain arrays
+    heap     UTF-8 strings, row-major (example 0 fields, example 1 fields, ...)
+    offsets  uint64[n * FIELDS + 1]; string (i, f) is heap[off[i*F+f]:off[i*F+f+1]]
+    index    uint32[n] example_index
+    domains  uint8[n] code into DOMAINS
+
+Opening only maps the file, so example N is an O(1) lookup and raw()
+returns zero-copy memoryview slices of the heap.
+"""
+
+import argparse
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+from metrics import METRICS
+
+MAGIC = b'NTECORP1'
+VERSION = 1
+HEADER = struct.Struct('<8sIIQQQQQ')
+
+FIELDS = (
+    'source_text',
+    'layer_1_excavate',
+    'layer_2_fracture',
+    'layer_3_suspend',
+    'layer_4_densify',
+    'layer_5_attune',
+    'sacred_remainder',
+)
+IDP_LAYERS = FIELDS[1:6]
+DOMAINS = ('mysticism', 'ethics', 'existentialism', 'theology')
+
+DEFAULT_SOURCE = 'user_input_files/Copy_2_314_trainset_openai.json'
+DEFAULT_STORE = 'user_input_files/trainset.corpus'
+
+
+def parse_example(idx, line):
+    """Parse one OpenAI chat-format JSONL line into a training_corpus record"""
+    with METRICS.span('json_decode'):
+        data = json.loads(line.strip())
+    user_content = ''
+    assistant_content = ''
+    for msg in data.get('messages', []):
+        if msg['role'] == 'user':
+            user_content = msg['content']
+        elif msg['role'] == 'assistant':
+            assistant_content = msg['content']
+
+    with METRICS.span('idp_parse'):
+        idp_layers = {name: '' for name in IDP_LAYERS}
+        if 'IDP/1' in assistant_content:
+            for part in assistant_content.split('IDP/')[1:]:
+                if part and part[0] in '12345':
+                    n = int(part[0])
+                    idp_layers[IDP_LAYERS[n - 1]] = f'IDP/{n} ' + part.strip()
+
+        sacred_remainder = ''
+        if 'Receive the remainder:' in assistant_content:
+            sacred_remainder = assistant_content.split('Receive the remainder:')[1].split('⸸')[0].strip()
+
+    lowered = user_content.lower()
+    domain = 'mysticism'
+    if 'ethics' in lowered or 'moral' in lowered:
+        domain = 'ethics'
+    elif 'meaning' in lowered or 'absurd' in lowered:
+        domain = 'existentialism'
+    elif 'god' in lowered or 'divine' in lowered:
+        domain = 'theology'
+
+    return {
+        'example_index': idx,
+        'source_text': user_content,
+        'idp_analysis': idp_layers,
+        'sacred_remainder': sacred_remainder,
+        'philosophical_domain': domain,
+    }
+
+
+def _record_fields(record):
+    idp = record.get('idp_analysis') or {}
+    return (
+        record.get('source_text') or '',
+        *(idp.get(name) or '' for name in IDP_LAYERS),
+        record.get('sacred_remainder') or '',
+    )
+
+
+def _pad(f):
+    pos = f.tell()
+    if pos % 8:
+        f.write(b'\0' * (8 - pos % 8))
+    return f.tell()
+
+
+def write_corpus(path, records):
+    """Stream training_corpus-shaped records into a store at `path`"""
+    offsets = array('Q', [0])
+    indexes = array('I')
+    domains = array('B')
+    domain_codes = {name: i for i, name in enumerate(DOMAINS)}
+    tmp = str(path) + '.tmp'
+
+    with open(tmp, 'wb') as f:
+        f.write(b'\0' * HEADER.size)
+        heap_pos = f.tell()
+        written = 0
+        for record in records:
+            for value in _record_fields(record):
+                encoded = value.encode('utf-8')
+                f.write(encoded)
+                written += len(encoded)
+                offsets.append(written)
+            indexes.append(int(record.get('example_index') or len(indexes) + 1))
+            domains.append(domain_codes.get(record.get('philosophical_domain'), 0))
+
+        offsets_pos = _pad(f)
+        offsets.tofile(f)
+        index_pos = _pad(f)
+        indexes.tofile(f)
+        domains_pos = f.tell()
+        domains.tofile(f)
+
+        f.seek(0)
+        f.write(HEADER.pack(MAGIC, VERSION, len(FIELDS), len(indexes), heap_pos,
+                            offsets_pos, index_pos, domains_pos))
+
+    os.replace(tmp, path)
+    return len(indexes)
+
+
+class CorpusStore:
+    """Read-only mmap view of a corpus store"""
+
+    def __init__(self, path):
+        self._file = open(path, 'rb')
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._mmap)
+
+        (magic, version, n_fields, n, heap_pos, offsets_pos, index_pos,
+         domains_pos) = HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC or version != VERSION or n_fields != len(FIELDS):
+            self.close()
+            raise ValueError(f"{path} is not a version {VERSION} corpus store")
+
+        self._n = n
+        self._heap_pos = heap_pos
+        self._offsets = self._view[offsets_pos:offsets_pos + 8 * (n * n_fields + 1)].cast('Q')
+        self._indexes = self._view[index_pos:index_pos + 4 * n].cast('I')
+        self._domains = self._view[domains_pos:domains_pos + n]
+
+    def __len__(self):
+        return self._n
+
+    def __getitem__(self, i):
+        return self.example(i)
+
+    def __iter__(self):
+        for i in range(self._n):
+            yield self.example(i)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    def close(self):
+        for name in ('_offsets', '_indexes', '_domains', '_view'):
+            view = getattr(self, name, None)
+            if view is not None:
+                view.release()
+        self._mmap.close()
+        self._file.close()
+
+    def raw(self, i, field):
+        """Zero-copy memoryview over the UTF-8 bytes of one field"""
+        if not 0 <= i < self._n:
+            raise IndexError(i)
+        slot = i * len(FIELDS) + FIELDS.index(field)
+        start = self._heap_pos + self._offsets[slot]
+        end = self._heap_pos + self._offsets[slot + 1]
+        return self._view[start:end]
+
+    def text(self, i, field):
+        return str(self.raw(i, field), 'utf-8')
+
+    def example_index(self, i):
+        return self._indexes[i]
+
+    def domain(self, i):
+        return DOMAINS[self._domains[i]]
+
+    def example(self, i):
+        """Decode example i into the training_corpus record shape"""
+        if i < 0:
+            i += self._n
+        return {
+            'example_index': self.example_index(i),
+            'source_text': self.text(i, 'source_text'),
+            'idp_analysis': {name: self.text(i, name) for name in IDP_LAYERS},
+            'sacred_remainder': self.text(i, 'sacred_remainder'),
+            'philosophical_domain': self.domain(i),
+        }
+
+
+def build_from_jsonl(source, store):
+    def records():
+        with open(source, 'r') as f:
+            for idx, line in enumerate(f, 1):
+                try:
+                    yield parse_example(idx, line)
+                except Exception as e:
+                    print(f"Error processing line {idx}: {e}", file=sys.stderr)
+
+    return write_corpus(store, records())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Memory-mapped IDP corpus store')
+    sub = parser.add_subparsers(dest='command', required=True)
+    build = sub.add_parser('build', help='build a store from trainset JSONL')
+    build.add_argument('--source', default=DEFAULT_SOURCE)
+    build.add_argument('--store', default=DEFAULT_STORE)
+    show = sub.add_parser('show', help='print example N as JSON')
+    show.add_argument('n', type=int)
+    show.add_argument('--store', default=DEFAULT_STORE)
+    info = sub.add_parser('info', help='print example count and domain breakdown')
+    info.add_argument('--store', default=DEFAULT_STORE)
+    args = parser.parse_args(argv)
+
+    if args.command == 'build':
+        count = build_from_jsonl(args.source, args.store)
+        print(f"✓ Wrote {count} examples to {args.store}")
+    elif args.command == 'show':
+        with CorpusStore(args.store) as store:
+            print(json.dumps(store[args.n], indent=2, ensure_ascii=False))
+    else:
+        with CorpusStore(args.store) as store:
+            counts = {}
+            for i in range(len(store)):
+                counts[store.domain(i)] = counts.get(store.domain(i), 0) + 1
+            print(f"{args.store}: {len(store)} examples")
+            for name, count in sorted(counts.items()):
+                print(f"  {name:.<30} {count:>8d}")
+
+
+if __name__ == '__main__':
+    main()
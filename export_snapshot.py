@@ -0,0 +1,357 @@
+#!/usr/bin/env python3
+"""
+Incremental columnar snapshot export of the Supabase dataset.
+
+Each table is written under <out>/<table>/ as numbered part files plus a
+_manifest.json that records the (watermark, id) of the last exported row.
+Re-running only pulls rows past that watermark, so production serves the
+delta and local analysis reads the compact snapshot. Updated rows are only
+picked up for tables watermarked on updated_at, which the triggers in
+migration 1762800400 keep current.
+
+A row's watermark is set when its transaction writes it, not when it
+commits, so a slow transaction can commit rows below a watermark already
+exported. Each run therefore re-reads an overlap window behind the
+watermark and skips rows whose (id, watermark) it has already exported.
+
+Parts are Parquet when pyarrow is installed, otherwise NumPy .npz with
+string columns stored as an offsets array into a UTF-8 heap.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from metrics import METRICS
+from supabase_rest import DEFAULT_PAGE_SIZE, SupabaseRest
+
+# table -> column used as the incremental watermark
+TABLES = {
+    'rpes': 'updated_at',
+    'axioms': 'created_at',
+    'knowledge_graph': 'created_at',
+    'training_corpus': 'created_at',
+    'iterative_densification_layers': 'created_at',
+    'transcendence_trajectories': 'created_at',
+    'une_definitions': 'created_at',
+    'file_rpe_relationships': 'created_at',
+    'pis_arguments': 'created_at',
+    'pis_claims': 'created_at',
+    'pis_concepts': 'created_at',
+    'pis_controlled_vocabulary': 'updated_at',
+    'pis_hypotheses': 'created_at',
+    'pis_norms': 'created_at',
+    'pis_objections': 'created_at',
+    'pis_provenance': 'generated_at',
+    'pis_runs': 'started_at',
+    'pis_scenarios': 'created_at',
+    'pis_textunits': 'created_at',
+    'pis_theses': 'created_at',
+}
+
+MANIFEST = '_manifest.json'
+ROWS_PER_PART = 50000
+# How far behind the watermark each run re-reads for late-committed rows
+OVERLAP_SECONDS = 600
+
+
+def _have_pyarrow():
+    try:
+        import pyarrow  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def rows_to_columns(rows):
+    """Pivot row dicts into column lists; JSON values become JSON strings"""
+    names = []
+    seen = set()
+    for row in rows:
+        for name in row:
+            if name not in seen:
+                seen.add(name)
+                names.append(name)
+
+    columns = {}
+    for name in names:
+        values = []
+        for row in rows:
+            value = row.get(name)
+            if isinstance(value, (dict, list)):
+                value = json.dumps(value, ensure_ascii=False)
+            values.append(value)
+        columns[name] = values
+    return columns
+
+
+def _column_kind(values):
+    kinds = {type(v) for v in values if v is not None}
+    if not kinds:
+        return 'str'
+    if kinds == {bool}:
+        return 'bool'
+    if kinds <= {int}:
+        return 'int'
+    if kinds <= {int, float}:
+        return 'float'
+    return 'str'
+
+
+def _write_npz(path, columns):
+    import numpy as np
+
+    arrays = {}
+    kinds = {}
+    for name, values in columns.items():
+        kind = _column_kind(values)
+        nulls = np.array([v is None for v in values], dtype=bool)
+        if kind == 'int' and nulls.any():
+            kind = 'float'
+        if kind == 'bool':
+            arrays[name] = np.array([bool(v) for v in values], dtype=bool)
+        elif kind == 'int':
+            arrays[name] = np.array(values, dtype=np.int64)
+        elif kind == 'float':
+            arrays[name] = np.array([np.nan if v is None else float(v) for v in values],
+                                    dtype=np.float64)
+        else:
+            encoded = [b'' if v is None else str(v).encode('utf-8') for v in values]
+            offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+            np.cumsum([len(b) for b in encoded], out=offsets[1:])
+            arrays[f'{name}.heap'] = np.frombuffer(b''.join(encoded), dtype=np.uint8)
+            arrays[f'{name}.offsets'] = offsets
+        if nulls.any():
+            arrays[f'{name}.nulls'] = nulls
+        kinds[name] = kind
+
+    arrays['__schema__'] = np.frombuffer(json.dumps(kinds).encode('utf-8'), dtype=np.uint8)
+    np.savez_compressed(path, **arrays)
+
+
+def _read_npz(path, names=None):
+    import numpy as np
+
+    with np.load(path) as data:
+        kinds = json.loads(data['__schema__'].tobytes().decode('utf-8'))
+        columns = {}
+        for name, kind in kinds.items():
+            if names is not None and name not in names:
+                continue
+            nulls = data[f'{name}.nulls'] if f'{name}.nulls' in data.files else None
+            if kind == 'str':
+                heap = data[f'{name}.heap'].tobytes()
+                offsets = data[f'{name}.offsets']
+                values = [heap[offsets[i]:offsets[i + 1]].decode('utf-8')
+                          for i in range(len(offsets) - 1)]
+            else:
+                values = data[name].tolist()
+            if nulls is not None:
+                values = [None if n else v for v, n in zip(values, nulls)]
+            columns[name] = values
+    return columns
+
+
+def _write_parquet(path, columns):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    normalized = {}
+    for name, values in columns.items():
+        kind = _column_kind(values)
+        if kind == 'float':
+            values = [None if v is None else float(v) for v in values]
+        elif kind == 'str':
+            values = [None if v is None else str(v) for v in values]
+        normalized[name] = values
+    pq.write_table(pa.table(normalized), path, compression='zstd')
+
+
+def _read_parquet(path, names=None):
+    import pyarrow.parquet as pq
+
+    if names is not None:
+        names = [n for n in pq.read_schema(path).names if n in names]
+    return pq.read_table(path, columns=names).to_pydict()
+
+
+def _read_part(path, names=None):
+    return _read_parquet(path, names) if path.suffix == '.parquet' else _read_npz(path, names)
+
+
+def load_manifest(table_dir):
+    path = table_dir / MANIFEST
+    if path.exists():
+        with open(path, 'r') as f:
+            return json.load(f)
+    return {'watermark': None, 'parts': [], 'rows': 0}
+
+
+def save_manifest(table_dir, manifest):
+    tmp = table_dir / (MANIFEST + '.tmp')
+    with open(tmp, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp, table_dir / MANIFEST)
+
+
+def _shift(mark, seconds):
+    return (datetime.fromisoformat(mark) - timedelta(seconds=seconds)).isoformat()
+
+
+def export_table(client, out_dir, table, watermark_column, page_size=DEFAULT_PAGE_SIZE,
+                 fmt=None, overlap=OVERLAP_SECONDS):
+    """Export rows past the stored watermark (less `overlap` seconds) into new part files"""
+    fmt = fmt or ('parquet' if _have_pyarrow() else 'npz')
+    table_dir = Path(out_dir) / table
+    table_dir.mkdir(parents=True, exist_ok=True)
+    manifest = load_manifest(table_dir)
+    filters = None
+    if manifest['watermark']:
+        filters = {watermark_column: f"gte.{_shift(manifest['watermark'][0], overlap)}"}
+    # id -> watermark of rows exported inside the overlap window
+    recent = dict(manifest.get('recent') or {})
+
+    buffered = []
+    exported = 0
+
+    def flush():
+        nonlocal buffered
+        if not buffered:
+            return
+        part_name = f"part-{len(manifest['parts']) + 1:05d}.{fmt}"
+        columns = rows_to_columns(buffered)
+        with METRICS.span('file_write'):
+            if fmt == 'parquet':
+                _write_parquet(table_dir / part_name, columns)
+            else:
+                _write_npz(table_dir / part_name, columns)
+        METRICS.incr('rows_written', len(buffered))
+        last = buffered[-1]
+        manifest['parts'].append({'file': part_name, 'rows': len(buffered)})
+        manifest['rows'] += len(buffered)
+        # A late row re-read from the overlap window must not move the watermark back
+        mark = manifest['watermark']
+        last_mark = datetime.fromisoformat(last[watermark_column])
+        if mark is None or last_mark >= datetime.fromisoformat(mark[0]):
+            manifest['watermark'] = [last[watermark_column], last['id']]
+        manifest['watermark_column'] = watermark_column
+        cutoff = datetime.fromisoformat(_shift(manifest['watermark'][0], overlap))
+        for row_id in [i for i, mark in recent.items() if datetime.fromisoformat(mark) < cutoff]:
+            del recent[row_id]
+        manifest['recent'] = dict(recent)
+        manifest['exported_at'] = time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime())
+        # Persist after every part so an interrupted run resumes cleanly
+        save_manifest(table_dir, manifest)
+        buffered = []
+
+    for page in client.iter_pages(table, watermark_column=watermark_column, filters=filters,
+                                  page_size=page_size):
+        METRICS.incr('rows_read', len(page))
+        fresh = [row for row in page if recent.get(row['id']) != row[watermark_column]]
+        for row in fresh:
+            recent[row['id']] = row[watermark_column]
+        buffered.extend(fresh)
+        exported += len(fresh)
+        if len(buffered) >= ROWS_PER_PART:
+            flush()
+    flush()
+
+    return exported
+
+
+def read_table(snapshot_dir, table, key='id'):
+    """Load a table from a snapshot as a dict of column lists.
+
+    Parts are merged in export order; when a row was re-exported after an
+    update, the latest version wins.
+    """
+    table_dir = Path(snapshot_dir) / table
+    manifest = load_manifest(table_dir)
+
+    merged = {}
+    positions = {}
+    count = 0
+    for part in manifest['parts']:
+        columns = _read_part(table_dir / part['file'])
+        n = len(next(iter(columns.values()), []))
+        for name in columns:
+            if name not in merged:
+                merged[name] = [None] * count
+        for i in range(n):
+            row_key = columns[key][i] if key in columns else None
+            if row_key is not None and row_key in positions:
+                slot = positions[row_key]
+                for name, values in merged.items():
+                    values[slot] = columns[name][i] if name in columns else None
+                continue
+            if row_key is not None:
+                positions[row_key] = count
+            for name, values in merged.items():
+                values.append(columns[name][i] if name in columns else None)
+            count += 1
+    return merged
+
+
+def iter_rows(snapshot_dir, table, key='id'):
+    """Yield a table's rows as dicts, one part file in memory at a time.
+
+    Only the key column is held for the whole table: a row re-exported
+    after an update is yielded once, from its latest part.
+    """
+    table_dir = Path(snapshot_dir) / table
+    parts = [table_dir / part['file'] for part in load_manifest(table_dir)['parts']]
+
+    latest = {}
+    for n, path in enumerate(parts):
+        for i, row_key in enumerate(_read_part(path, [key]).get(key, [])):
+            if row_key is not None:
+                latest[row_key] = (n, i)
+
+    for n, path in enumerate(parts):
+        columns = _read_part(path)
+        names = list(columns)
+        for i, values in enumerate(zip(*(columns[name] for name in names))):
+            row = dict(zip(names, values))
+            row_key = row.get(key)
+            if row_key is None or latest.get(row_key) == (n, i):
+                yield row
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Incremental columnar snapshot export')
+    parser.add_argument('--out', default='snapshot', help='snapshot directory')
+    parser.add_argument('--tables', nargs='*', default=list(TABLES),
+                        help='tables to export (default: all)')
+    parser.add_argument('--page-size', type=int, default=DEFAULT_PAGE_SIZE)
+    parser.add_argument('--format', choices=['parquet', 'npz'], default=None,
+                        help='part file format (default: parquet if pyarrow is installed)')
+    parser.add_argument('--overlap-seconds', type=int, default=OVERLAP_SECONDS,
+                        help='re-read this far behind the watermark for late commits')
+    args = parser.parse_args(argv)
+
+    client = SupabaseRest()
+    total = 0
+    for table in args.tables:
+        if table not in TABLES:
+            print(f"✗ Unknown table: {table}", file=sys.stderr)
+            continue
+        started = time.perf_counter()
+        try:
+            count = export_table(client, args.out, table, TABLES[table],
+                                 page_size=args.page_size, fmt=args.format,
+                                 overlap=args.overlap_seconds)
+        except Exception as e:
+            print(f"✗ {table}: {e}", file=sys.stderr)
+            continue
+        total += count
+        print(f"✓ {table}: {count} new rows ({time.perf_counter() - started:.2f}s)")
+
+    print(f"Exported {total} rows to {args.out}/")
+
+
+if __name__ == '__main__':
+    main()
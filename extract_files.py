@@ -1,6 +1,7 @@
 #!/usr/bin/env python3
 """Extract all files from repomix archive"""
 
+import argparse
 import re
 import os
 from pathlib import Path
@@ -11,6 +12,11 @@ def extract_files_from_repomix(repomix_path):
     with open(repomix_path, 'r', encoding='utf-8', errors='replace') as f:
         content = f.read()
     
+    # Drop the closing 'End of Codebase' banner so it isn't glued onto the last file
+    footer = re.search(r'\n=+\s*\nEnd of Codebase\s*\n=+\s*$', content)
+    if footer:
+        content = content[:footer.start()]
+    
     # Find all file markers and their positions
     file_pattern = r'================\s*File:\s*([^\n]+)\s*================'
     matches = list(re.finditer(file_pattern, content))
@@ -77,8 +83,11 @@ def extract_files_from_repomix(repomix_path):
         'extracted_files': extracted_files
     }
 
-if __name__ == '__main__':
-    repomix_path = 'repomix-TheRole.txt'
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Extract files from a repomix archive')
+    parser.add_argument('archive', nargs='?', default='repomix-TheRole.txt')
+    args = parser.parse_args(argv)
+    repomix_path = args.archive
     
     print(f"Extracting files from {repomix_path}...\n")
     results = extract_files_from_repomix(repomix_path)
@@ -98,3 +107,6 @@ if __name__ == '__main__':
     print(f"\nCreated files:")
     for f in results['created_files']:
         print(f"  - {f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+"""
+Sharded, parallel fine-tuning export from training_corpus.
+
+Rows are streamed from the REST API, a local snapshot (export_snapshot.py)
+or a corpus store (corpus_store.py), rebuilt into OpenAI chat-format JSONL
+in a process pool and written to size/count-capped shards. Each shard gets
+token-length statistics computed in one vectorized pass, recorded in
+<out>/manifest.json.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+from metrics import METRICS
+
+SYSTEM_PROMPT = (
+    'You are Professor Nihil, Sage of the Abyss and Architect of Nihiltheism. '
+    'You do not soothe; you expose. \n'
+    'Operate via the Iterative Densification Protocol (IDP): '
+    'Excavate → Fracture → Suspend → Densify → Attune. \n'
+    'Reject consolations of theism and naïve nihilism alike. '
+    'Speak lucidly, severely, elegantly. End with the sigil: ⸸'
+)
+SIGIL = '⸸'
+IDP_LAYERS = ('layer_1_excavate', 'layer_2_fracture', 'layer_3_suspend',
+              'layer_4_densify', 'layer_5_attune')
+CHUNK_SIZE = 2000
+# Rough BPE ratio used when tiktoken is not installed
+BYTES_PER_TOKEN = 4.0
+
+
+def _layer_text(n, value):
+    # Loaders store layers as 'IDP/<n> <n> — ...'; restore the original 'IDP/<n> — ...'
+    prefix = f'IDP/{n} '
+    if value.startswith(prefix):
+        value = value[len(prefix):]
+    if not value.startswith(str(n)):
+        value = f'{n} — {value}'
+    return f'IDP/{value}'
+
+
+def build_assistant(record):
+    idp = record.get('idp_analysis') or {}
+    if isinstance(idp, str):
+        idp = json.loads(idp)
+    lines = []
+    for n, name in enumerate(IDP_LAYERS, 1):
+        value = (idp.get(name) or '').strip()
+        if value:
+            lines.append(_layer_text(n, value))
+
+    remainder = (record.get('sacred_remainder') or '').strip()
+    if remainder and not any('Receive the remainder:' in line for line in lines):
+        lines.append(f'IDP/5 — Attune: Receive the remainder: {remainder}')
+
+    if not lines:
+        return None
+    text = '\n'.join(lines)
+    if not text.endswith(SIGIL):
+        text += f'\n{SIGIL}'
+    return text
+
+
+def build_example(record):
+    """Chat-format example, or None when the row has no IDP content to rebuild"""
+    assistant = build_assistant(record)
+    if assistant is None:
+        return None
+    return {
+        'messages': [
+            {'role': 'system', 'content': SYSTEM_PROMPT},
+            {'role': 'user', 'content': record.get('source_text') or ''},
+            {'role': 'assistant', 'content': assistant},
+        ]
+    }
+
+
+def _token_counter():
+    try:
+        import tiktoken
+    except ImportError:
+        return None
+    return tiktoken.get_encoding('cl100k_base')
+
+
+_ENCODING = None
+
+
+def _encode_chunk(records):
+    """Worker: returns (jsonl lines, token count or -byte length per line, skipped)"""
+    global _ENCODING
+    if _ENCODING is None:
+        _ENCODING = _token_counter() or False
+
+    lines = []
+    sizes = []
+    skipped = 0
+    for record in records:
+        example = build_example(record)
+        if example is None:
+            skipped += 1
+            continue
+        line = (json.dumps(example, ensure_ascii=False) + '\n').encode('utf-8')
+        lines.append(line)
+        if _ENCODING:
+            sizes.append(sum(len(_ENCODING.encode(m['content'])) for m in example['messages']))
+        else:
+            sizes.append(-len(line))
+    return lines, sizes, skipped
+
+
+def token_stats(sizes):
+    """Vectorized token statistics; negative sizes are byte lengths to estimate from"""
+    arr = np.asarray(sizes, dtype=np.float64)
+    tokens = np.where(arr < 0, np.ceil(-arr / BYTES_PER_TOKEN), arr)
+    if not len(tokens):
+        return {}
+    return {
+        'estimated': bool((arr < 0).any()),
+        'total': int(tokens.sum()),
+        'mean': float(tokens.mean()),
+        'p50': float(np.percentile(tokens, 50)),
+        'p95': float(np.percentile(tokens, 95)),
+        'max': int(tokens.max()),
+        'min': int(tokens.min()),
+    }
+
+
+class ShardWriter:
+    """Rolls over to a new shard when the example or byte cap is reached"""
+
+    def __init__(self, out_dir, prefix='train', max_examples=None, max_bytes=None):
+        self.out_dir = Path(out_dir)
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        self.prefix = prefix
+        self.max_examples = max_examples
+        self.max_bytes = max_bytes
+        self.shards = []
+        self._file = None
+
+    def _open(self):
+        name = f'{self.prefix}-{len(self.shards):05d}.jsonl'
+        self._file = open(self.out_dir / name, 'wb', buffering=1 << 20)
+        self.shards.append({'file': name, 'examples': 0, 'bytes': 0, 'sizes': []})
+
+    def _close(self):
+        if self._file is None:
+            return
+        self._file.close()
+        self._file = None
+        shard = self.shards[-1]
+        shard['tokens'] = token_stats(shard.pop('sizes'))
+
+    def write(self, line, size):
+        shard = self.shards[-1] if self.shards else None
+        if (shard is None or self._file is None
+                or (self.max_examples and shard['examples'] >= self.max_examples)
+                or (self.max_bytes and shard['examples']
+                    and shard['bytes'] + len(line) > self.max_bytes)):
+            self._close()
+            self._open()
+            shard = self.shards[-1]
+        self._file.write(line)
+        shard['examples'] += 1
+        shard['bytes'] += len(line)
+        shard['sizes'].append(size)
+
+    def close(self):
+        self._close()
+        with open(self.out_dir / 'manifest.json', 'w') as f:
+            json.dump({'shards': self.shards}, f, indent=2)
+
+
+def iter_rest(page_size):
+    from supabase_rest import SupabaseRest
+
+    client = SupabaseRest()
+    columns = 'id,example_index,source_text,idp_analysis,sacred_remainder,created_at'
+    for page in client.iter_pages('training_corpus', columns=columns, page_size=page_size):
+        yield from page
+
+
+def iter_snapshot(snapshot_dir):
+    from export_snapshot import iter_rows
+
+    yield from iter_rows(snapshot_dir, 'training_corpus')
+
+
+def iter_store(path):
+    from corpus_store import CorpusStore
+
+    with CorpusStore(path) as store:
+        yield from store
+
+
+def chunked(records, size):
+    chunk = []
+    for record in records:
+        chunk.append(record)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def export(records, out_dir, workers=None, max_examples=None, max_bytes=None,
+           chunk_size=CHUNK_SIZE):
+    workers = workers or os.cpu_count() or 1
+    writer = ShardWriter(out_dir, max_examples=max_examples, max_bytes=max_bytes)
+    total = skipped = 0
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        # Keep a bounded window of chunks in flight (map() would pull the whole
+        # source up front) and write results in input order, so shard contents
+        # are deterministic
+        pending = deque()
+        chunks = chunked(records, chunk_size)
+        for chunk in chunks:
+            pending.append(pool.submit(_encode_chunk, chunk))
+            if len(pending) >= workers * 2:
+                break
+
+        while pending:
+            lines, sizes, chunk_skipped = pending.popleft().result()
+            chunk = next(chunks, None)
+            if chunk is not None:
+                pending.append(pool.submit(_encode_chunk, chunk))
+
+            skipped += chunk_skipped
+            with METRICS.span('file_write'):
+                for line, size in zip(lines, sizes):
+                    writer.write(line, size)
+            total += len(lines)
+            METRICS.incr('rows_written', len(lines))
+    writer.close()
+    return total, skipped, writer.shards
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Export training_corpus as fine-tuning JSONL')
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument('--snapshot', help='read from an export_snapshot.py directory')
+    source.add_argument('--store', help='read from a corpus_store.py file')
+    parser.add_argument('--out', default='finetune_export', help='output directory')
+    parser.add_argument('--max-examples', type=int, help='examples per shard')
+    parser.add_argument('--max-bytes', type=int, default=100 * 1024 * 1024,
+                        help='bytes per shard (default 100 MiB)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--page-size', type=int, default=1000)
+    args = parser.parse_args(argv)
+
+    if args.snapshot:
+        records = iter_snapshot(args.snapshot)
+    elif args.store:
+        records = iter_store(args.store)
+    else:
+        records = iter_rest(args.page_size)
+
+    started = time.perf_counter()
+    try:
+        total, skipped, shards = export(records, args.out, workers=args.workers,
+                               max_examples=args.max_examples, max_bytes=args.max_bytes)
+    except Exception as e:
+        print(f"✗ Export failed: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    elapsed = time.perf_counter() - started
+    print(f"✓ Exported {total} examples into {len(shards)} shards in {args.out}/ ({elapsed:.2f}s)")
+    if skipped:
+        print(f"  Skipped {skipped} rows without IDP layers or remainder")
+    for shard in shards:
+        tokens = shard.get('tokens') or {}
+        print(f"  {shard['file']}: {shard['examples']} examples, "
+              f"{shard['bytes']:,} bytes, p95 {tokens.get('p95', 0):.0f} tokens")
+
+
+if __name__ == '__main__':
+    main()
@@ -2,30 +2,21 @@
 """
 Script to insert sample relationship data for testing the Knowledge Graph and Cross-Axiom Relationships
 """
-import os
-import requests
-import json
-from supabase import create_client, Client
+import argparse
 
-def main():
-    # Initialize Supabase client
-    supabase_url = os.environ.get('SUPABASE_URL')
-    supabase_key = os.environ.get('SUPABASE_SERVICE_ROLE_KEY')
-    
-    if not supabase_url or not supabase_key:
-        print("Missing SUPABASE_URL or SUPABASE_SERVICE_ROLE_KEY environment variables")
-        return
-    
-    supabase: Client = create_client(supabase_url, supabase_key)
+from supabase_rest import SupabaseRest
+
+def main(argv=None):
+    argparse.ArgumentParser(description='Insert sample knowledge_graph relationships').parse_args(argv)
+
+    # Initialize Supabase client (SUPABASE_URL / SUPABASE_SERVICE_ROLE_KEY)
+    client = SupabaseRest()
     
     try:
         # Get existing RPEs and Axioms
         print("Fetching existing RPEs and Axioms...")
-        rpes_result = supabase.table('rpes').select('id,entity_id,name').execute()
-        axioms_result = supabase.table('axioms').select('id,axiom_number,title').execute()
-        
-        rpes = rpes_result.data
-        axioms = axioms_result.data
+        rpes = client.select('rpes', {'select': 'id,entity_id,name'})
+        axioms = client.select('axioms', {'select': 'id,axiom_number,title'})
         
         print(f"Found {len(rpes)} RPEs and {len(axioms)} Axioms")
         
@@ -78,7 +69,7 @@ def main():
         # Insert relationships
         print(f"Inserting {len(relationships)} sample relationships...")
         for rel in relationships:
-            result = supabase.table('knowledge_graph').insert(rel).execute()
+            client.insert('knowledge_graph', [rel])
             print(f"Created relationship: {rel['relationship_type']}")
         
         print("Sample relationships created successfully!")
@@ -87,9 +78,9 @@ def main():
         if len(axioms) >= 1 and len(rpes) >= 1:
             # Associate the first axiom with the first RPE
             print("Associating Axiom with RPE for Cross-Axiom Relationships...")
-            supabase.table('axioms').update({
+            client.update('axioms', {'id': f"eq.{axioms[0]['id']}"}, {
                 'rpe_id': rpes[0]['id']
-            }).eq('id', axioms[0]['id']).execute()
+            })
             print("Axiom-RPE association created!")
         
     except Exception as e:
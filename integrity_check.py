@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+"""
+Streaming referential-integrity check for tables without foreign keys.
+
+knowledge_graph lost its foreign keys in migration 1762675998 so edges can
+point at RPEs or axioms, and nothing stops them from dangling. This loads the
+ids of every referenced table page by page into sorted arrays of 16-byte
+UUIDs, then streams the referencing tables and tests each page with a
+vectorized binary search, so memory stays proportional to the entity tables
+and the orphans found rather than the edge count.
+
+    python integrity_check.py                  # report only
+    python integrity_check.py --quarantine     # copy orphans aside, then fix
+    python integrity_check.py --delete         # fix without keeping a copy
+
+Orphaned knowledge_graph and file_rpe_relationships rows are deleted;
+axioms with a dangling rpe_id have it set to NULL.
+"""
+
+import argparse
+import json
+import sys
+import time
+import uuid
+from datetime import datetime, timezone
+
+import numpy as np
+
+from metrics import METRICS
+from supabase_rest import DEFAULT_PAGE_SIZE, SupabaseRest
+
+ID_DTYPE = 'S16'
+CHUNK = 200
+SAMPLE_SIZE = 10
+QUARANTINE_TABLE = 'integrity_quarantine'
+
+# referencing table -> (fix, [(column, tables the value may point into)])
+REFERENCES = {
+    'knowledge_graph': ('delete', [
+        ('source_entity_id', ('rpes', 'axioms')),
+        ('target_entity_id', ('rpes', 'axioms')),
+    ]),
+    'file_rpe_relationships': ('delete', [
+        ('rpe_id', ('rpes',)),
+        ('file_id', ('uploaded_files',)),
+    ]),
+    'axioms': ('nullify', [
+        ('rpe_id', ('rpes',)),
+    ]),
+}
+
+
+def to_ids(values):
+    """UUID strings -> array of raw 16-byte ids (one hex decode per page)"""
+    if not values:
+        return np.empty(0, dtype=ID_DTYPE)
+    return np.frombuffer(bytes.fromhex(''.join(values).replace('-', '')), dtype=ID_DTYPE)
+
+
+def to_uuid(raw):
+    # numpy drops trailing NUL bytes when handing back S16 scalars
+    return str(uuid.UUID(bytes=bytes(raw).ljust(16, b'\0')))
+
+
+class IdSet:
+    """Sorted, de-duplicated id array with vectorized membership"""
+
+    def __init__(self, ids):
+        self.ids = np.unique(ids)
+
+    @classmethod
+    def union(cls, sets):
+        return cls(np.concatenate([s.ids for s in sets]))
+
+    def contains(self, ids):
+        if not len(self.ids):
+            return np.zeros(len(ids), dtype=bool)
+        positions = np.searchsorted(self.ids, ids)
+        positions[positions == len(self.ids)] = 0
+        return self.ids[positions] == ids
+
+    def __len__(self):
+        return len(self.ids)
+
+
+def load_id_set(client, table, page_size=DEFAULT_PAGE_SIZE):
+    pages = []
+    # Keyset on the primary key alone: no created_at index needed
+    for page in client.iter_pages(table, columns='id', watermark_column='id',
+                                  page_size=page_size):
+        pages.append(to_ids([row['id'] for row in page]))
+        METRICS.incr('rows_read', len(page))
+    return IdSet(np.concatenate(pages) if pages else np.empty(0, dtype=ID_DTYPE))
+
+
+class Finding:
+    """Orphans for one referencing column"""
+
+    def __init__(self, table, column, targets):
+        self.table = table
+        self.column = column
+        self.targets = targets
+        self.scanned = 0
+        self._rows = []
+        self._missing = []
+
+    def add(self, row_ids, missing_values):
+        self._rows.append(row_ids)
+        self._missing.append(missing_values)
+
+    def keep(self, mask):
+        self._rows = [self.rows[mask]]
+        self._missing = [self.missing[mask]]
+
+    @property
+    def rows(self):
+        return np.concatenate(self._rows) if self._rows else np.empty(0, dtype=ID_DTYPE)
+
+    @property
+    def missing(self):
+        return np.concatenate(self._missing) if self._missing else np.empty(0, dtype=ID_DTYPE)
+
+    def to_dict(self, samples=SAMPLE_SIZE):
+        missing = np.unique(self.missing)
+        return {
+            'table': self.table,
+            'column': self.column,
+            'references': list(self.targets),
+            'scanned': self.scanned,
+            'orphans': int(len(self.rows)),
+            'distinct_missing': int(len(missing)),
+            'sample_rows': [to_uuid(r) for r in self.rows[:samples]],
+            'sample_missing': [to_uuid(m) for m in missing[:samples]],
+        }
+
+
+def scan_table(client, table, checks, id_sets, before, page_size=DEFAULT_PAGE_SIZE):
+    """Stream `table` and collect rows whose checked columns reference nothing"""
+    findings = [Finding(table, column, targets) for column, targets in checks]
+    targets = [IdSet.union([id_sets[t] for t in ts]) if len(ts) > 1 else id_sets[ts[0]]
+               for _, ts in checks]
+    columns = ','.join(['id'] + [column for column, _ in checks])
+    # Rows created after the entity sets were loaded could point at entities
+    # we have not seen yet
+    filters = {'created_at': f'lt.{before}'}
+    for page in client.iter_pages(table, columns=columns, watermark_column='id',
+                                  page_size=page_size, filters=filters):
+        with METRICS.span('integrity_check_page'):
+            row_ids = to_ids([row['id'] for row in page])
+            for finding, id_set in zip(findings, targets):
+                present = np.array([row.get(finding.column) is not None for row in page])
+                values = to_ids([row[finding.column] for row in page
+                                 if row.get(finding.column) is not None])
+                finding.scanned += len(values)
+                orphan = ~id_set.contains(values)
+                if orphan.any():
+                    finding.add(row_ids[present][orphan], values[orphan])
+        METRICS.incr('rows_read', len(page))
+    return findings
+
+
+def confirm_missing(client, findings):
+    """Re-check candidate dangling ids against the live tables before fixing.
+
+    Drops orphans whose target appeared since the id sets were loaded.
+    """
+    for finding in findings:
+        missing = np.unique(finding.missing)
+        if not len(missing):
+            continue
+        found = []
+        for table in finding.targets:
+            for i in range(0, len(missing), CHUNK):
+                chunk = [to_uuid(m) for m in missing[i:i + CHUNK]]
+                rows = client.select(table, {'select': 'id', 'id': f"in.({','.join(chunk)})"})
+                found.extend(row['id'] for row in rows)
+        if found:
+            finding.keep(~IdSet(to_ids(found)).contains(finding.missing))
+
+
+def quarantine(client, table, row_ids, reasons):
+    """Copy the full rows into integrity_quarantine before they are changed"""
+    for i in range(0, len(row_ids), CHUNK):
+        chunk = row_ids[i:i + CHUNK]
+        rows = client.select(table, {'select': '*', 'id': f"in.({','.join(chunk)})"})
+        records = [{'source_table': table, 'row_id': row['id'],
+                    'reason': reasons[row['id']], 'row_data': row} for row in rows]
+        if records:
+            client.insert(QUARANTINE_TABLE, records, upsert=True,
+                          on_conflict='source_table,row_id')
+
+
+def fix_table(client, table, findings, keep_copy):
+    """Delete (or NULL out the reference of) every orphaned row in `table`"""
+    fix, _ = REFERENCES[table]
+    reasons = {}
+    by_column = {}
+    for finding in findings:
+        for raw in np.unique(finding.rows):
+            row_id = to_uuid(raw)
+            reasons[row_id] = ','.join(filter(None, [reasons.get(row_id),
+                                                     f'dangling {finding.column}']))
+            by_column.setdefault(finding.column, []).append(row_id)
+    row_ids = sorted(reasons)
+    if not row_ids:
+        return 0
+
+    if keep_copy:
+        with METRICS.span('integrity_quarantine'):
+            quarantine(client, table, row_ids, reasons)
+
+    with METRICS.span('integrity_fix'):
+        if fix == 'delete':
+            for i in range(0, len(row_ids), CHUNK):
+                client.delete(table, {'id': f"in.({','.join(row_ids[i:i + CHUNK])})"})
+        else:
+            for column, ids in by_column.items():
+                for i in range(0, len(ids), CHUNK):
+                    client.update(table, {'id': f"in.({','.join(ids[i:i + CHUNK])})"},
+                                  {column: None})
+    METRICS.incr('rows_fixed', len(row_ids))
+    return len(row_ids)
+
+
+def check(client, tables=None, page_size=DEFAULT_PAGE_SIZE):
+    """Return findings for every referencing table (all of REFERENCES by default)"""
+    tables = tables or list(REFERENCES)
+    needed = sorted({t for table in tables for _, ts in REFERENCES[table][1] for t in ts})
+    before = datetime.now(timezone.utc).isoformat()
+
+    id_sets = {}
+    for table in needed:
+        with METRICS.span('integrity_load_ids'):
+            id_sets[table] = load_id_set(client, table, page_size)
+        print(f"  loaded {len(id_sets[table]):>10,d} ids from {table}")
+
+    findings = {}
+    for table in tables:
+        findings[table] = scan_table(client, table, REFERENCES[table][1], id_sets,
+                                     before, page_size)
+    return findings
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Find rows referencing missing entities')
+    parser.add_argument('--tables', nargs='*', choices=list(REFERENCES), default=None,
+                        help='referencing tables to check (default: all)')
+    parser.add_argument('--page-size', type=int, default=DEFAULT_PAGE_SIZE)
+    action = parser.add_mutually_exclusive_group()
+    action.add_argument('--delete', action='store_true',
+                        help='delete orphaned rows (axioms: NULL the rpe_id)')
+    action.add_argument('--quarantine', action='store_true',
+                        help=f'copy orphaned rows into {QUARANTINE_TABLE}, then fix as --delete')
+    parser.add_argument('--out', help='write the JSON report here')
+    args = parser.parse_args(argv)
+
+    client = SupabaseRest()
+    started = time.perf_counter()
+    try:
+        findings = check(client, args.tables, args.page_size)
+        fixed = {}
+        if args.delete or args.quarantine:
+            for table, table_findings in findings.items():
+                confirm_missing(client, table_findings)
+                fixed[table] = fix_table(client, table, table_findings, args.quarantine)
+    except Exception as e:
+        print(f"✗ Integrity check failed: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    report = {
+        'checked_at': datetime.now(timezone.utc).isoformat(),
+        'findings': [f.to_dict() for fs in findings.values() for f in fs],
+        'fixed': fixed,
+    }
+    for finding in report['findings']:
+        print(f"  {finding['table'] + '.' + finding['column']:.<45} "
+              f"{finding['orphans']:>8d} orphans / {finding['scanned']:>10,d} "
+              f"({finding['distinct_missing']} missing ids)")
+    for table, count in fixed.items():
+        verb = 'quarantined' if args.quarantine else 'fixed'
+        print(f"  {verb} {count} rows in {table}")
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump(report, f, indent=2)
+    print(f"✓ Integrity check finished ({time.perf_counter() - started:.2f}s)")
+
+
+if __name__ == '__main__':
+    main()
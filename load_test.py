@@ -0,0 +1,406 @@
+#!/usr/bin/env python3
+"""
+Open-loop asyncio load generator for the edge-function API.
+
+Requests arrive as a Poisson process at --rate per second regardless of how
+fast earlier ones complete, and latency is measured from each request's
+scheduled arrival time, so a slow server shows up as queueing delay rather
+than a lower offered load. The JSON report has p50/p95/p99 latency,
+throughput and error rates overall and per endpoint.
+
+    python load_test.py --standin --scenario mixed --rate 50 --duration 30
+    python load_test.py --target http://localhost:54321 --scenario queries
+"""
+
+import argparse
+import asyncio
+import base64
+import json
+import os
+import random
+import re
+import ssl
+import sys
+import time
+import uuid
+from urllib.parse import urlsplit
+
+FIXTURES = ['test_document.md', 'test_philosophical_document.md', 'test_philosophy_file.txt']
+BASE64_FIXTURE = 'test_file_base64.txt'
+FUNCTIONS_PATH = '/functions/v1/'
+# Endpoint label for arrivals whose request could not be built
+BUILD_ERROR_ENDPOINT = 'request-build'
+
+
+# -- request payloads -----------------------------------------------------
+
+def load_fixtures(root='.'):
+    """(filename, bytes) pairs from the test_* fixtures, base64 one decoded"""
+    files = []
+    for name in FIXTURES:
+        path = os.path.join(root, name)
+        if os.path.exists(path):
+            with open(path, 'rb') as f:
+                files.append((name, f.read()))
+    path = os.path.join(root, BASE64_FIXTURE)
+    if os.path.exists(path):
+        with open(path, 'rb') as f:
+            files.append(('test_file_decoded.txt', base64.b64decode(f.read())))
+    if not files:
+        raise FileNotFoundError(f'no test_* fixtures found in {os.path.abspath(root)}')
+    return files
+
+
+def extract_concepts(files, limit=200):
+    """Sentences from the fixtures, used as process-philosophical-input concepts"""
+    concepts = []
+    for _, content in files:
+        text = re.sub(r'\s+', ' ', content.decode('utf-8', 'replace'))
+        concepts.extend(s.strip() for s in re.split(r'[.!?]+', text) if len(s.strip()) > 20)
+    return concepts[:limit] or ['What is the ground of groundlessness']
+
+
+def multipart(fields, files):
+    """Encode a multipart/form-data body; returns (content_type, body)"""
+    boundary = uuid.uuid4().hex
+    chunks = []
+    for name, value in fields.items():
+        chunks.append(f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"'
+                      f'\r\n\r\n{value}\r\n'.encode())
+    for name, (filename, content, mime) in files.items():
+        chunks.append(f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"; '
+                      f'filename="{filename}"\r\nContent-Type: {mime}\r\n\r\n'.encode())
+        chunks.append(content + b'\r\n')
+    chunks.append(f'--{boundary}--\r\n'.encode())
+    return f'multipart/form-data; boundary={boundary}', b''.join(chunks)
+
+
+def _json(payload):
+    return 'application/json', json.dumps(payload).encode()
+
+
+class Workload:
+    """Builds requests for each operation from fixtures and known entity ids"""
+
+    def __init__(self, files, thesis_ids, rng):
+        self.files = files
+        self.concepts = extract_concepts(files)
+        self.thesis_ids = thesis_ids
+        self.rng = rng
+
+    def _thesis(self):
+        if not self.thesis_ids:
+            raise RuntimeError('no theses available; list-pis-theses returned nothing')
+        return self.rng.choice(self.thesis_ids)
+
+    def upload(self):
+        name, content = self.rng.choice(self.files)
+        mime = 'text/markdown' if name.endswith('.md') else 'text/plain'
+        # upload-file dedups on the SHA-256 of the content, so a nonce line keeps
+        # every upload on the full storage + insert path instead of the 409
+        content += f'\n\n<!-- load-test {uuid.uuid4().hex} -->\n'.encode()
+        content_type, body = multipart({'original_filename': name},
+                                       {'file': (name, content, mime)})
+        return 'upload-file', 'upload-file', content_type, body
+
+    def concept(self):
+        return ('process-philosophical-input', 'process-philosophical-input',
+                *_json({'concept': self.rng.choice(self.concepts)}))
+
+    def query(self, query_type):
+        payload = {'query_type': query_type, 'entity_type': 'thesis',
+                   'entity_id': self._thesis(), 'parameters': {}}
+        return 'phi-ql-query', f'phi-ql-query:{query_type}', *_json(payload)
+
+    def graph(self):
+        return 'get-knowledge-graph-full', 'get-knowledge-graph-full', *_json({})
+
+
+# scenario -> [(weight, operation)]; operations are Workload method calls
+SCENARIOS = {
+    'uploads': [(1, lambda w: w.upload())],
+    'concepts': [(1, lambda w: w.concept())],
+    'queries': [
+        (50, lambda w: w.query('WHY')),
+        (30, lambda w: w.query('TRACE')),
+        (10, lambda w: w.query('COUNTEREX')),
+        (10, lambda w: w.graph()),
+    ],
+    'mixed': [
+        (10, lambda w: w.upload()),
+        (15, lambda w: w.concept()),
+        (35, lambda w: w.query('WHY')),
+        (20, lambda w: w.query('TRACE')),
+        (5, lambda w: w.query('COUNTEREX')),
+        (15, lambda w: w.graph()),
+    ],
+}
+
+
+# -- HTTP -----------------------------------------------------------------
+
+class HttpError(Exception):
+    pass
+
+
+class ConnectionPool:
+    """Keep-alive HTTP/1.1 connections to one host over asyncio streams"""
+
+    def __init__(self, base_url, headers=None, timeout=30.0):
+        parts = urlsplit(base_url)
+        self.host = parts.hostname
+        self.tls = parts.scheme == 'https'
+        self.port = parts.port or (443 if self.tls else 80)
+        self.prefix = parts.path.rstrip('/')
+        self.headers = headers or {}
+        self.timeout = timeout
+        self._idle = []
+
+    async def request(self, method, path, body=b'', content_type='application/json'):
+        """Return (status, body); raises HttpError on transport failure"""
+        lines = [f'{method} {self.prefix}{path} HTTP/1.1', f'Host: {self.host}',
+                 f'Content-Type: {content_type}', f'Content-Length: {len(body)}']
+        lines.extend(f'{k}: {v}' for k, v in self.headers.items())
+        message = ('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1') + body
+
+        # An idle connection the server has since closed gets one fresh retry
+        while True:
+            reused = bool(self._idle)
+            writer = None
+            try:
+                if reused:
+                    reader, writer = self._idle.pop()
+                else:
+                    reader, writer = await asyncio.open_connection(
+                        self.host, self.port,
+                        ssl=ssl.create_default_context() if self.tls else None)
+                writer.write(message)
+                status, payload, keep_alive = await asyncio.wait_for(
+                    self._read_response(reader), self.timeout)
+                break
+            except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError,
+                    ValueError) as e:
+                if writer is not None:
+                    writer.close()
+                if not reused:
+                    raise HttpError(f'{type(e).__name__}: {e}') from None
+        if keep_alive:
+            self._idle.append((reader, writer))
+        else:
+            writer.close()
+        return status, payload
+
+    @staticmethod
+    async def _read_response(reader):
+        status_line = await reader.readline()
+        if not status_line:
+            raise ValueError('connection closed')
+        status = int(status_line.split()[1])
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+        if headers.get('transfer-encoding', '').lower() == 'chunked':
+            chunks = []
+            while True:
+                size = int((await reader.readline()).split(b';')[0], 16)
+                if size == 0:
+                    await reader.readline()
+                    break
+                chunks.append(await reader.readexactly(size))
+                await reader.readline()
+            payload = b''.join(chunks)
+        elif 'content-length' in headers:
+            payload = await reader.readexactly(int(headers['content-length']))
+        else:
+            payload = await reader.read()
+            headers['connection'] = 'close'
+        return status, payload, headers.get('connection', '').lower() != 'close'
+
+    def close(self):
+        for _, writer in self._idle:
+            writer.close()
+        self._idle.clear()
+
+
+# -- run and report -------------------------------------------------------
+
+def percentile(sorted_values, q):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    index = max(0, min(len(sorted_values) - 1, round(q / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def summarize(samples, elapsed):
+    """samples: [(latency_seconds, ok)] -> report dict with milliseconds"""
+    latencies = sorted(s[0] * 1000 for s in samples)
+    errors = sum(1 for s in samples if not s[1])
+    return {
+        'requests': len(samples),
+        'errors': errors,
+        'error_rate': round(errors / len(samples), 4) if samples else 0.0,
+        'throughput_rps': round(len(samples) / elapsed, 2) if elapsed else 0.0,
+        'latency_ms': {
+            'p50': _round(percentile(latencies, 50)),
+            'p95': _round(percentile(latencies, 95)),
+            'p99': _round(percentile(latencies, 99)),
+            'max': _round(latencies[-1] if latencies else None),
+            'mean': _round(sum(latencies) / len(latencies) if latencies else None),
+        },
+    }
+
+
+def _round(value):
+    return round(value, 2) if value is not None else None
+
+
+async def fetch_thesis_ids(pool):
+    """Thesis ids from list-pis-theses ({success, theses, statistics})"""
+    status, payload = await pool.request('POST', FUNCTIONS_PATH + 'list-pis-theses', b'{}')
+    if status != 200:
+        raise HttpError(f'list-pis-theses returned {status}: {payload[:200]!r}')
+    try:
+        body = json.loads(payload)
+    except ValueError as e:
+        raise HttpError(f'list-pis-theses returned invalid JSON: {e}') from None
+    theses = body.get('theses') or body.get('data') or []
+    return [row['id'] for row in theses if row.get('id')]
+
+
+async def run(pool, workload, scenario, rate, duration, max_in_flight, seed):
+    rng = random.Random(seed)
+    weights = [w for w, _ in SCENARIOS[scenario]]
+    operations = [op for _, op in SCENARIOS[scenario]]
+    samples = {}
+    error_samples = {}
+    in_flight = set()
+    dropped = 0
+
+    async def fire(scheduled, operation):
+        try:
+            function, endpoint, content_type, body = operation(workload)
+        except Exception as e:
+            # A request that cannot be built is a failed arrival, not a dead run
+            error_samples.setdefault(BUILD_ERROR_ENDPOINT, f'{type(e).__name__}: {e}')
+            samples.setdefault(BUILD_ERROR_ENDPOINT, []).append(
+                (time.perf_counter() - scheduled, False))
+            return
+        ok = False
+        try:
+            status, payload = await pool.request('POST', FUNCTIONS_PATH + function, body,
+                                                 content_type)
+            ok = 200 <= status < 300
+            if not ok:
+                error_samples.setdefault(endpoint, f'{status}: {payload[:200]!r}')
+        except HttpError as e:
+            error_samples.setdefault(endpoint, str(e))
+        samples.setdefault(endpoint, []).append((time.perf_counter() - scheduled, ok))
+
+    started = time.perf_counter()
+    next_arrival = started
+    while True:
+        next_arrival += rng.expovariate(rate)
+        if next_arrival - started >= duration:
+            break
+        delay = next_arrival - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if len(in_flight) >= max_in_flight:
+            dropped += 1
+            continue
+        operation = rng.choices(operations, weights)[0]
+        task = asyncio.create_task(fire(next_arrival, operation))
+        in_flight.add(task)
+        task.add_done_callback(in_flight.discard)
+
+    if in_flight:
+        await asyncio.wait(in_flight)
+    elapsed = time.perf_counter() - started
+
+    all_samples = [s for endpoint in samples.values() for s in endpoint]
+    report = {
+        'scenario': scenario,
+        'offered_rate_rps': rate,
+        'duration_s': round(elapsed, 2),
+        'dropped': dropped,
+        'overall': summarize(all_samples, elapsed),
+        'endpoints': {name: summarize(s, elapsed) for name, s in sorted(samples.items())},
+    }
+    if error_samples:
+        report['first_errors'] = error_samples
+    return report
+
+
+async def main_async(args):
+    headers = {}
+    key = os.environ.get('SUPABASE_ANON_KEY')
+    if key:
+        headers = {'Authorization': f'Bearer {key}', 'apikey': key}
+
+    standin = None
+    target = args.target
+    if args.standin:
+        from standin_backend import serve
+        standin, _ = serve(port=0, latency_ms=args.standin_latency_ms,
+                           jitter_ms=args.standin_latency_ms / 2)
+        target = f'http://127.0.0.1:{standin.server_address[1]}'
+
+    pool = ConnectionPool(target, headers, timeout=args.timeout)
+    try:
+        thesis_ids = await fetch_thesis_ids(pool)
+        workload = Workload(load_fixtures(args.fixtures), thesis_ids, random.Random(args.seed))
+        report = await run(pool, workload, args.scenario, args.rate, args.duration,
+                           args.max_in_flight, args.seed)
+    finally:
+        pool.close()
+        if standin:
+            standin.shutdown()
+    report['target'] = 'standin' if standin else target
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Open-loop load test for the edge functions')
+    parser.add_argument('--target', default=os.environ.get('LOAD_TEST_TARGET',
+                                                           'http://localhost:54321'),
+                        help='base URL serving /functions/v1 (supabase start, or the proxy)')
+    parser.add_argument('--standin', action='store_true',
+                        help='start standin_backend.py in-process and target it')
+    parser.add_argument('--standin-latency-ms', type=float, default=20.0)
+    parser.add_argument('--scenario', choices=sorted(SCENARIOS), default='mixed')
+    parser.add_argument('--rate', type=float, default=20.0, help='arrivals per second')
+    parser.add_argument('--duration', type=float, default=30.0, help='seconds')
+    parser.add_argument('--max-in-flight', type=int, default=1000,
+                        help='arrivals beyond this many outstanding requests are dropped')
+    parser.add_argument('--timeout', type=float, default=30.0)
+    parser.add_argument('--fixtures', default='.', help='directory holding the test_* files')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--out', help='write the JSON report here instead of stdout')
+    args = parser.parse_args(argv)
+
+    try:
+        report = asyncio.run(main_async(args))
+    except (OSError, RuntimeError, HttpError) as e:
+        print(f"✗ Load test failed: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    text = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, 'w') as f:
+            f.write(text + '\n')
+        overall = report['overall']
+        print(f"✓ {overall['requests']} requests, {overall['throughput_rps']} rps, "
+              f"p99 {overall['latency_ms']['p99']} ms, "
+              f"{overall['error_rate']:.1%} errors -> {args.out}")
+    else:
+        print(text)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,79 +1,54 @@
+import argparse
 import json
-import sys
 
-# Read the training data
-with open('user_input_files/Copy_2_314_trainset_openai.json', 'r') as f:
-    lines = f.readlines()
+from corpus_store import DEFAULT_STORE, CorpusStore
+from load_corpus_batch import DEFAULT_TRAINSET, parse_trainset
+from metrics import METRICS
 
-# Parse and prepare SQL insert statements
-sql_values = []
-for idx, line in enumerate(lines, 1):
-    try:
-        data = json.loads(line.strip())
-        messages = data.get('messages', [])
-        
-        # Extract user input and assistant response
-        user_content = ''
-        assistant_content = ''
-        
-        for msg in messages:
-            if msg['role'] == 'user':
-                user_content = msg['content']
-            elif msg['role'] == 'assistant':
-                assistant_content = msg['content']
-        
-        # Parse IDP layers from assistant content
-        idp_layers = {
-            'layer_1_excavate': '',
-            'layer_2_fracture': '',
-            'layer_3_suspend': '',
-            'layer_4_densify': '',
-            'layer_5_attune': ''
-        }
-        
-        if 'IDP/1' in assistant_content:
-            parts = assistant_content.split('IDP/')
-            for part in parts[1:]:
-                if part.startswith('1'):
-                    idp_layers['layer_1_excavate'] = 'IDP/1 ' + part.split('IDP/')[0].strip()
-                elif part.startswith('2'):
-                    idp_layers['layer_2_fracture'] = 'IDP/2 ' + part.split('IDP/')[0].strip()
-                elif part.startswith('3'):
-                    idp_layers['layer_3_suspend'] = 'IDP/3 ' + part.split('IDP/')[0].strip()
-                elif part.startswith('4'):
-                    idp_layers['layer_4_densify'] = 'IDP/4 ' + part.split('IDP/')[0].strip()
-                elif part.startswith('5'):
-                    idp_layers['layer_5_attune'] = 'IDP/5 ' + part.split('IDP/')[0].strip()
-        
-        # Extract sacred remainder (final quote)
-        sacred_remainder = ''
-        if 'Receive the remainder:' in assistant_content:
-            sacred_remainder = assistant_content.split('Receive the remainder:')[1].split('⸸')[0].strip()
-        
-        # Determine philosophical domain
-        domain = 'mysticism'  # default
-        if 'ethics' in user_content.lower() or 'moral' in user_content.lower():
-            domain = 'ethics'
-        elif 'meaning' in user_content.lower() or 'absurd' in user_content.lower():
-            domain = 'existentialism'
-        elif 'god' in user_content.lower() or 'divine' in user_content.lower():
-            domain = 'theology'
-        
-        # Escape single quotes
-        user_content_escaped = user_content.replace("'", "''")
-        sacred_remainder_escaped = sacred_remainder.replace("'", "''")
-        idp_json_escaped = json.dumps(idp_layers).replace("'", "''")
-        
-        sql_values.append(f"({idx}, '{user_content_escaped}', '{idp_json_escaped}'::jsonb, '{sacred_remainder_escaped}', '{domain}')")
-    
-    except Exception as e:
-        print(f"Error processing line {idx}: {e}", file=sys.stderr)
-        continue
+DEFAULT_OUTPUT = '/tmp/training_corpus_insert.sql'
 
-# Write SQL to file
-with open('/tmp/training_corpus_insert.sql', 'w') as f:
-    f.write("INSERT INTO training_corpus (example_index, source_text, idp_analysis, sacred_remainder, philosophical_domain) VALUES\n")
-    f.write(',\n'.join(sql_values))
-    f.write(';')
 
-print(f"Generated SQL for {len(sql_values)} examples")
\ No newline at end of file
+def sql_row(record):
+    """One VALUES tuple; single quotes escaped for a plain SQL literal"""
+    user_content_escaped = record['source_text'].replace("'", "''")
+    sacred_remainder_escaped = record['sacred_remainder'].replace("'", "''")
+    idp_json_escaped = json.dumps(record['idp_analysis']).replace("'", "''")
+    return (f"({record['example_index']}, '{user_content_escaped}', "
+            f"'{idp_json_escaped}'::jsonb, '{sacred_remainder_escaped}', "
+            f"'{record['philosophical_domain']}')")
+
+
+def generate_sql(path=DEFAULT_TRAINSET, output=DEFAULT_OUTPUT, store=None):
+    """Write one INSERT for the whole trainset; parsed from `store` if given"""
+    if store:
+        with CorpusStore(store) as corpus:
+            records = list(corpus)
+    else:
+        records = parse_trainset(path)
+    sql_values = [sql_row(record) for record in records]
+
+    # Write SQL to file
+    with METRICS.span('file_write'):
+        with open(output, 'w') as f:
+            f.write("INSERT INTO training_corpus (example_index, source_text, idp_analysis, "
+                    "sacred_remainder, philosophical_domain) VALUES\n")
+            f.write(',\n'.join(sql_values))
+            f.write(';')
+    METRICS.incr('rows_written', len(sql_values))
+
+    print(f"Generated SQL for {len(sql_values)} examples")
+    return len(sql_values)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Generate a training_corpus INSERT script')
+    parser.add_argument('--input', default=DEFAULT_TRAINSET, help='OpenAI-format JSONL')
+    parser.add_argument('--store', nargs='?', const=DEFAULT_STORE,
+                        help=f'read a corpus store instead (default {DEFAULT_STORE})')
+    parser.add_argument('--output', default=DEFAULT_OUTPUT)
+    args = parser.parse_args(argv)
+    generate_sql(args.input, args.output, args.store)
+
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
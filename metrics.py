@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""
+Lightweight timing spans, counters and latency histograms for the Python tooling.
+
+Disabled by default; every call is a cheap no-op until enabled. Set
+METRICS_EXPORT to a path ending in .json or .prom to enable collection and
+write a report at exit, METRICS_INTERVAL to also rewrite it every N seconds,
+and METRICS_PROFILE=cprofile|tracemalloc to capture a profile alongside it.
+"""
+
+import atexit
+import json
+import math
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+# Upper bounds in seconds; the last bucket catches everything else
+LATENCY_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.005, 0.01, 0.025, 0.05,
+                   0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, math.inf)
+
+
+class Histogram:
+    """Fixed-bucket latency histogram with count/sum/min/max"""
+
+    __slots__ = ('buckets', 'counts', 'count', 'total', 'min', 'max')
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = 0.0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        self.count += 1
+        self.total += value
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    def quantile(self, q):
+        """Estimate a quantile as the upper bound of the bucket containing it"""
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        running = 0
+        for bound, n in zip(self.buckets, self.counts):
+            running += n
+            if running >= target:
+                return min(bound, self.max)
+        return self.max
+
+    def to_dict(self):
+        return {
+            'count': self.count,
+            'sum': self.total,
+            'min': self.min if self.count else 0.0,
+            'max': self.max,
+            'mean': self.total / self.count if self.count else 0.0,
+            'p50': self.quantile(0.50),
+            'p95': self.quantile(0.95),
+            'p99': self.quantile(0.99),
+            'buckets': {('+Inf' if b == math.inf else str(b)): n
+                        for b, n in zip(self.buckets, self.counts)},
+        }
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ('registry', 'name', 'started')
+
+    def __init__(self, registry, name):
+        self.registry = registry
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.registry.observe(self.name, time.perf_counter() - self.started)
+        if exc_type is not None:
+            self.registry.incr(f'{self.name}_errors')
+        return False
+
+
+class Metrics:
+    """Registry of counters and histograms; thread-safe when enabled"""
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.counters = {}
+        self.histograms = {}
+        self.started = time.time()
+        self._lock = threading.Lock()
+
+    def span(self, name):
+        """Context manager timing a block into the `name` histogram"""
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name)
+
+    def timed(self, name):
+        """Decorator form of span()"""
+        def decorator(fn):
+            def wrapper(*args, **kwargs):
+                with self.span(name):
+                    return fn(*args, **kwargs)
+            wrapper.__name__ = fn.__name__
+            wrapper.__doc__ = fn.__doc__
+            return wrapper
+        return decorator
+
+    def incr(self, name, value=1):
+        if not self.enabled:
+            return
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def observe(self, name, seconds):
+        if not self.enabled:
+            return
+        with self._lock:
+            hist = self.histograms.get(name)
+            if hist is None:
+                hist = self.histograms[name] = Histogram()
+            hist.observe(seconds)
+
+    def reset(self):
+        with self._lock:
+            self.counters.clear()
+            self.histograms.clear()
+            self.started = time.time()
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                'started_at': self.started,
+                'elapsed_s': time.time() - self.started,
+                'counters': dict(self.counters),
+                'histograms': {k: h.to_dict() for k, h in self.histograms.items()},
+            }
+
+    def to_json(self):
+        return json.dumps(self.to_dict(), indent=2)
+
+    def to_prometheus(self, prefix='nte'):
+        """Render counters and histograms in Prometheus text exposition format"""
+        lines = []
+        with self._lock:
+            for name, value in sorted(self.counters.items()):
+                metric = f'{prefix}_{_sanitize(name)}_total'
+                lines.append(f'# TYPE {metric} counter')
+                lines.append(f'{metric} {value}')
+            for name, hist in sorted(self.histograms.items()):
+                metric = f'{prefix}_{_sanitize(name)}_seconds'
+                lines.append(f'# TYPE {metric} histogram')
+                running = 0
+                for bound, n in zip(hist.buckets, hist.counts):
+                    running += n
+                    le = '+Inf' if bound == math.inf else repr(bound)
+                    lines.append(f'{metric}_bucket{{le="{le}"}} {running}')
+                lines.append(f'{metric}_sum {hist.total}')
+                lines.append(f'{metric}_count {hist.count}')
+        return '\n'.join(lines) + '\n'
+
+    def export(self, path):
+        """Write the report to `path`; format follows the file extension"""
+        text = self.to_prometheus() if path.endswith('.prom') else self.to_json()
+        tmp = path + '.tmp'
+        with open(tmp, 'w') as f:
+            f.write(text)
+        os.replace(tmp, path)
+
+    def start_periodic_export(self, path, interval):
+        """Rewrite the report every `interval` seconds from a daemon thread"""
+        def loop():
+            while True:
+                time.sleep(interval)
+                self.export(path)
+        thread = threading.Thread(target=loop, name='metrics-export', daemon=True)
+        thread.start()
+        return thread
+
+
+def _sanitize(name):
+    return ''.join(c if c.isalnum() else '_' for c in name)
+
+
+@contextmanager
+def profile(mode, output):
+    """Capture a cProfile or tracemalloc profile of the enclosed block"""
+    if mode == 'cprofile':
+        import cProfile
+        import pstats
+
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            profiler.dump_stats(output + '.pstats')
+            with open(output + '.txt', 'w') as f:
+                pstats.Stats(profiler, stream=f).sort_stats('cumulative').print_stats(40)
+    elif mode == 'tracemalloc':
+        import tracemalloc
+
+        tracemalloc.start()
+        try:
+            yield
+        finally:
+            snapshot = tracemalloc.take_snapshot()
+            current, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            with open(output + '.txt', 'w') as f:
+                f.write(f'current={current} peak={peak}\n')
+                for stat in snapshot.statistics('lineno')[:40]:
+                    f.write(f'{stat}\n')
+    else:
+        yield
+
+
+METRICS = Metrics(enabled=bool(os.environ.get('METRICS_EXPORT')))
+
+_profile_ctx = None
+
+
+def _finish():
+    global _profile_ctx
+    if _profile_ctx is not None:
+        _profile_ctx.__exit__(None, None, None)
+        _profile_ctx = None
+    path = os.environ.get('METRICS_EXPORT')
+    if path and METRICS.enabled:
+        METRICS.export(path)
+        print(f"Metrics written to {path}", file=sys.stderr)
+
+
+if METRICS.enabled:
+    _interval = float(os.environ.get('METRICS_INTERVAL', '0') or 0)
+    if _interval > 0:
+        METRICS.start_periodic_export(os.environ['METRICS_EXPORT'], _interval)
+    _mode = os.environ.get('METRICS_PROFILE')
+    if _mode:
+        _profile_ctx = profile(_mode, os.environ['METRICS_EXPORT'] + '.profile')
+        _profile_ctx.__enter__()
+    atexit.register(_finish)
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Single entry point for the Python tooling.
+
+    python nte.py <command> [args...]
+    python nte.py batch jobs.txt        # several commands in one interpreter
+    python nte.py batch -               # daemon: run commands as they arrive on stdin
+
+A command's module is only imported when that command runs, so --help and
+quick commands start without loading numpy, pyarrow or the HTTP stack, and
+in batch mode every module stays warm after its first job. Configuration is
+read from the environment (SUPABASE_URL, SUPABASE_SERVICE_ROLE_KEY,
+METRICS_EXPORT, ...); --env-file loads KEY=VALUE lines into it first.
+"""
+
+import importlib
+import os
+import sys
+import time
+
+# command -> (module, summary); each module exposes main(argv=None)
+COMMANDS = {
+    'extract': ('extract_files', 'extract files from a repomix archive'),
+    'verify': ('verify_structure', 'report the extracted file structure'),
+    'pack': ('pack_repomix', 'pack the tree into a repomix archive'),
+    'load-corpus': ('load_corpus_batch', 'parse the trainset and insert it into training_corpus'),
+    'gen-sql': ('load_training_data', 'write a training_corpus INSERT script'),
+    'insert-relationships': ('insert_sample_relationships',
+                             'insert sample knowledge_graph relationships'),
+    'setup': ('complete_phase1_setup', 'create the documents bucket and write the setup SQL'),
+    'setup-guide': ('setup_file_upload_db', 'print the manual File Upload System setup'),
+    'corpus': ('corpus_store', 'build or inspect the memory-mapped corpus store'),
+    'snapshot': ('export_snapshot', 'incremental columnar snapshot export'),
+    'similarity': ('similarity_index', 'build or update the RPE similarity index'),
+    'finetune-export': ('finetune_export', 'export sharded fine-tuning JSONL'),
+    'une-classify': ('une_classifier', 'reclassify rpes.une_signature in bulk'),
+    'trajectory-cache': ('trajectory_cache', 'refresh the per-RPE trajectory cache'),
+    'provenance-closure': ('provenance_closure', 'maintain the pis_provenance closure'),
+    'integrity': ('integrity_check', 'find rows referencing missing entities'),
+    'session-worker': ('session_worker', 'drain queued file_processing_sessions'),
+    'proxy': ('phiql_proxy', 'caching proxy for phi-ql-query'),
+    'standin': ('standin_backend', 'local stand-in for the edge functions'),
+    'load-test': ('load_test', 'open-loop load test for the edge functions'),
+}
+
+
+def usage(out=sys.stdout):
+    print("usage: nte.py [--env-file PATH] <command> [args...]\n"
+          "       nte.py [--env-file PATH] batch [--stop-on-error] FILE|-\n", file=out)
+    print("commands:", file=out)
+    for name, (_, summary) in COMMANDS.items():
+        print(f"  {name:<22}{summary}", file=out)
+    print(f"  {'batch':<22}run one command per line from FILE, or from stdin as it arrives",
+          file=out)
+    print("\nRun 'nte.py <command> --help' for a command's options.", file=out)
+
+
+def load_env_file(path):
+    """KEY=VALUE lines into os.environ; variables already set take precedence"""
+    with open(path, 'r') as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith('#') or '=' not in line:
+                continue
+            key, _, value = line.removeprefix('export ').partition('=')
+            os.environ.setdefault(key.strip(), value.strip().strip('"\''))
+
+
+def run(name, argv):
+    """Run one command in this interpreter and return its exit code"""
+    if name not in COMMANDS:
+        print(f"✗ Unknown command: {name}", file=sys.stderr)
+        return 2
+    module_name, _ = COMMANDS[name]
+    saved_argv0 = sys.argv[0]
+    # So each command's argparse usage reads "nte.py <command> ..."
+    sys.argv[0] = f'nte.py {name}'
+    try:
+        importlib.import_module(module_name).main(argv)
+    except SystemExit as e:
+        if e.code is None or isinstance(e.code, int):
+            return e.code or 0
+        print(e.code, file=sys.stderr)
+        return 1
+    finally:
+        sys.argv[0] = saved_argv0
+    return 0
+
+
+def batch(source, stop_on_error=False):
+    """Run commands line by line; '#' starts a comment. Returns failed job count."""
+    import shlex
+    import traceback
+
+    stream = sys.stdin if source == '-' else open(source, 'r')
+    failed = 0
+    try:
+        for lineno, line in enumerate(stream, 1):
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            started = time.perf_counter()
+            try:
+                words = shlex.split(line)
+            except ValueError as e:
+                # e.g. an unbalanced quote; one bad line must not end a stdin daemon
+                print(f"✗ Cannot parse job: {e}", file=sys.stderr)
+                words = None
+            if words is None:
+                code = 2
+            elif words[0] == 'batch':
+                print("✗ batch cannot be nested", file=sys.stderr)
+                code = 2
+            else:
+                try:
+                    code = run(words[0], words[1:])
+                except Exception:
+                    traceback.print_exc()
+                    code = 1
+            elapsed = time.perf_counter() - started
+            mark = '✓' if code == 0 else '✗'
+            print(f"{mark} [{lineno}] {line} ({elapsed:.2f}s, exit {code})",
+                  file=sys.stderr, flush=True)
+            if code:
+                failed += 1
+                if stop_on_error:
+                    break
+            sys.stdout.flush()
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+    return failed
+
+
+def main(argv=None):
+    args = list(sys.argv[1:] if argv is None else argv)
+    while args and args[0].startswith('-'):
+        option = args.pop(0)
+        if option in ('-h', '--help'):
+            usage()
+            return 0
+        if option == '--env-file' and args:
+            load_env_file(args.pop(0))
+        elif option.startswith('--env-file='):
+            load_env_file(option.split('=', 1)[1])
+        else:
+            print(f"✗ Unknown option: {option}", file=sys.stderr)
+            return 2
+
+    if not args:
+        usage(sys.stderr)
+        return 2
+    name, rest = args[0], args[1:]
+    if name == 'batch':
+        stop_on_error = '--stop-on-error' in rest
+        rest = [a for a in rest if a != '--stop-on-error']
+        if len(rest) != 1:
+            print("✗ batch takes exactly one FILE (or - for stdin)", file=sys.stderr)
+            return 2
+        return 1 if batch(rest[0], stop_on_error) else 0
+    return run(name, rest)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Pack a directory tree into a repomix archive (inverse of extract_files.py).
+
+Files are read in a thread pool but written in sorted path order, so the
+same tree always produces the same archive. A <archive>.manifest.json
+sidecar records each file's size, mtime and byte range; on the next run
+unchanged files are copied straight from the previous archive instead of
+being re-read.
+"""
+
+import argparse
+import fnmatch
+import gzip
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from metrics import METRICS
+
+SECTION_RULE = b'=' * 64
+FILE_RULE = b'=' * 16
+
+DEFAULT_EXCLUDES = [
+    '.git/**', 'node_modules/**', '**/__pycache__/**', '*.pyc', '.venv/**', 'venv/**',
+    'dist/**', 'snapshot/**', 'similarity_index/**', 'repomix-*.txt', 'repomix-*.txt.gz',
+    '*.manifest.json',
+]
+BINARY_SNIFF_BYTES = 8192
+
+
+def _matches(path, patterns):
+    for pattern in patterns:
+        if fnmatch.fnmatch(path, pattern):
+            return True
+        # Let 'dir/**' also match files directly inside dir
+        if pattern.endswith('/**') and (path + '/').startswith(pattern[:-2]):
+            return True
+        if pattern.startswith('**/') and fnmatch.fnmatch(path, pattern[3:]):
+            return True
+    return False
+
+
+def collect_files(root, includes=None, excludes=None):
+    """Return sorted relative POSIX paths under root that pass the globs"""
+    root = Path(root)
+    includes = includes or ['**']
+    excludes = DEFAULT_EXCLUDES if excludes is None else excludes
+    selected = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        rel_dir = Path(dirpath).relative_to(root).as_posix()
+        rel_dir = '' if rel_dir == '.' else rel_dir + '/'
+        # Prune excluded directories before descending
+        dirnames[:] = [d for d in dirnames if not _matches(rel_dir + d + '/', excludes)
+                       and not _matches(rel_dir + d, excludes)]
+        for name in filenames:
+            rel = rel_dir + name
+            if _matches(rel, excludes):
+                continue
+            if not any(fnmatch.fnmatch(rel, p) or p == '**' for p in includes):
+                continue
+            selected.append(rel)
+    selected.sort()
+    return selected
+
+
+def segment_header(path):
+    return FILE_RULE + b'\nFile: ' + path.encode('utf-8') + b'\n' + FILE_RULE + b'\n'
+
+
+def read_segment(root, path):
+    """Read one file and return its full archive segment, or None if binary"""
+    with METRICS.span('read'):
+        with open(Path(root) / path, 'rb') as f:
+            content = f.read()
+    if b'\0' in content[:BINARY_SNIFF_BYTES]:
+        return None
+    METRICS.incr('bytes_read', len(content))
+    return segment_header(path) + content + b'\n\n'
+
+
+def _archive_stat(path):
+    st = os.stat(path)
+    return [st.st_size, st.st_mtime_ns]
+
+
+def load_manifest(archive):
+    """Segment table for `archive`, or {} if the manifest belongs to another file"""
+    path = Path(str(archive) + '.manifest.json')
+    if not path.exists():
+        return {}
+    with open(path, 'r') as f:
+        manifest = json.load(f)
+    # Offsets are only valid for the exact archive they were recorded against
+    if manifest.get('archive') != _archive_stat(archive):
+        print(f"Manifest {path} does not match {archive}; re-reading every file",
+              file=sys.stderr)
+        return {}
+    return manifest.get('files', {})
+
+
+def _open_archive(path, mode, compressed=None):
+    if compressed is None:
+        compressed = str(path).endswith('.gz')
+    if compressed:
+        return gzip.open(path, mode, compresslevel=6)
+    return open(path, mode)
+
+
+def pack(root, output, includes=None, excludes=None, previous=None, workers=8, prefetch=64):
+    """Write the archive and its manifest; returns (packed, reused, skipped)"""
+    root = Path(root)
+    files = collect_files(root, includes, excludes)
+    previous = previous if previous is not None else output
+    old_manifest = load_manifest(previous) if Path(previous).exists() else {}
+    old_archive = _open_archive(previous, 'rb') if old_manifest else None
+
+    stats = {}
+    for path in files:
+        st = os.stat(root / path)
+        stats[path] = [st.st_size, st.st_mtime_ns]
+
+    new_manifest = {}
+    packed = reused = skipped = 0
+    tmp_output = str(output) + '.tmp'
+
+    try:
+        with _open_archive(tmp_output, 'wb', str(output).endswith('.gz')) as out, \
+                ThreadPoolExecutor(max_workers=workers) as pool:
+            out.write(SECTION_RULE + b'\nFiles\n' + SECTION_RULE + b'\n\n')
+            offset = len(SECTION_RULE) * 2 + len(b'\nFiles\n\n\n')
+
+            def fetch(path):
+                old = old_manifest.get(path)
+                if old and old['stat'] == stats[path]:
+                    return ('reuse', old)
+                return ('read', pool.submit(read_segment, root, path))
+
+            # Keep a bounded window of reads in flight while writing in order
+            pending = deque()
+            queue = iter(files)
+            for path in queue:
+                pending.append((path, fetch(path)))
+                if len(pending) >= prefetch:
+                    break
+
+            while pending:
+                path, (kind, value) = pending.popleft()
+                next_path = next(queue, None)
+                if next_path is not None:
+                    pending.append((next_path, fetch(next_path)))
+
+                if kind == 'reuse':
+                    old_archive.seek(value['offset'])
+                    segment = old_archive.read(value['length'])
+                    reused += 1
+                else:
+                    segment = value.result()
+                    if segment is None:
+                        skipped += 1
+                        continue
+                    packed += 1
+
+                with METRICS.span('file_write'):
+                    out.write(segment)
+                new_manifest[path] = {'stat': stats[path], 'offset': offset,
+                                      'length': len(segment)}
+                offset += len(segment)
+
+            out.write(SECTION_RULE + b'\nEnd of Codebase\n' + SECTION_RULE + b'\n')
+    finally:
+        if old_archive is not None:
+            old_archive.close()
+
+    # The manifest carries the new archive's size and mtime (a rename keeps
+    # both), so a crash between the two renames can't pair it with old offsets
+    manifest_path = str(output) + '.manifest.json'
+    with open(manifest_path + '.tmp', 'w') as f:
+        json.dump({'root': str(root), 'archive': _archive_stat(tmp_output),
+                   'files': new_manifest}, f)
+    os.replace(tmp_output, output)
+    os.replace(manifest_path + '.tmp', manifest_path)
+    return packed, reused, skipped
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Pack a tree into a repomix archive')
+    parser.add_argument('root', nargs='?', default='.', help='directory to pack')
+    parser.add_argument('-o', '--output', default='repomix-TheRole.txt',
+                        help='archive path; a .gz suffix enables gzip output')
+    parser.add_argument('--include', action='append', help='glob to include (repeatable)')
+    parser.add_argument('--exclude', action='append', help='extra glob to exclude (repeatable)')
+    parser.add_argument('--previous', help='archive to reuse unchanged segments from '
+                                           '(default: the output path)')
+    parser.add_argument('--full', action='store_true', help='ignore any previous archive')
+    parser.add_argument('--workers', type=int, default=8)
+    args = parser.parse_args(argv)
+
+    excludes = DEFAULT_EXCLUDES + (args.exclude or [])
+    previous = os.devnull if args.full else args.previous
+
+    started = time.perf_counter()
+    try:
+        packed, reused, skipped = pack(args.root, args.output, args.include, excludes,
+                                       previous=previous, workers=args.workers)
+    except OSError as e:
+        print(f"✗ Failed: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    print(f"✓ Wrote {args.output}: {packed} read, {reused} reused, {skipped} binary skipped "
+          f"({time.perf_counter() - started:.2f}s)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,360 @@
+#!/usr/bin/env python3
+"""
+Local caching proxy for phi-ql-query and the read-only edge functions.
+
+    python phiql_proxy.py --upstream http://localhost:54321 --port 8787
+
+Point the app's functions URL at http://localhost:8787. WHY/TRACE queries and
+GET-style functions are served from an LRU+TTL cache; concurrent identical
+requests share a single upstream call. COUNTEREX/REPAIR, adversarial-loop and
+npe-pis-validate pass through and invalidate every entry tagged with the
+entity they wrote for. GET /_proxy/stats reports hit rate and latency;
+DELETE /_proxy/cache[/<entity_id>] drops entries.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from metrics import Histogram
+
+READ_ONLY_FUNCTIONS = {
+    'get-axioms', 'get-knowledge-graph', 'get-knowledge-graph-full', 'get-pis-entity',
+    'get-rpe', 'get-rpe-relationships', 'get-rpe-trajectory', 'get-training-data',
+    'get-trajectory', 'list-pis-theses',
+}
+CACHEABLE_QUERIES = {'WHY', 'TRACE'}
+# function -> body fields naming the entity whose cached reads go stale
+WRITE_FUNCTIONS = {
+    'phi-ql-query': ('entity_id',),
+    'adversarial-loop': ('thesis_id',),
+    'npe-pis-validate': ('rpe_id',),
+    'process-philosophical-input': (),
+}
+ENTITY_FIELDS = ('entity_id', 'rpe_id', 'thesis_id', 'id')
+# Entries with no entity (lists, whole graphs) are dropped on any write
+GLOBAL_TAG = '*'
+FORWARDED_HEADERS = ('authorization', 'apikey', 'content-type', 'x-client-info')
+
+
+class TTLCache:
+    """LRU cache with per-entry expiry and entity tags for invalidation"""
+
+    def __init__(self, max_entries=1024, ttl=300.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._tags = {}
+        self._lock = threading.Lock()
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires, _ = entry
+            if expires < time.monotonic():
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def put(self, key, value, tags):
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, time.monotonic() + self.ttl, tags)
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def invalidate(self, tag):
+        with self._lock:
+            keys = list(self._tags.get(tag, ()))
+            for key in keys:
+                self._remove(key)
+            self.invalidations += len(keys)
+            return len(keys)
+
+    def clear(self):
+        with self._lock:
+            count = len(self._entries)
+            self._entries.clear()
+            self._tags.clear()
+            self.invalidations += count
+            return count
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _remove(self, key):
+        _, _, tags = self._entries.pop(key)
+        for tag in tags:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+
+class _Flight:
+    __slots__ = ('event', 'result')
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+
+
+class CachingProxy:
+    """Transport-independent proxy logic; `upstream` performs the real call"""
+
+    def __init__(self, upstream, max_entries=1024, ttl=300.0):
+        self.upstream = upstream
+        self.cache = TTLCache(max_entries, ttl)
+        self._inflight = {}
+        self._generations = {}
+        self._lock = threading.Lock()
+        self.counts = {'hits': 0, 'misses': 0, 'coalesced': 0, 'passthrough': 0}
+        self.hit_latency = Histogram()
+        self.miss_latency = Histogram()
+        self.passthrough_latency = Histogram()
+
+    @staticmethod
+    def _body_json(body):
+        try:
+            parsed = json.loads(body) if body else {}
+        except ValueError:
+            return {}
+        return parsed if isinstance(parsed, dict) else {}
+
+    def classify(self, method, function, query, body):
+        """Return ('read', key, tags), ('write', None, tags) or ('pass', None, ())"""
+        payload = self._body_json(body)
+        if function == 'phi-ql-query':
+            if payload.get('query_type') in CACHEABLE_QUERIES:
+                return 'read', self._key(method, function, query, payload), \
+                    self._tags(payload, query)
+            return 'write', None, self._write_tags(function, payload)
+        if function in READ_ONLY_FUNCTIONS:
+            return 'read', self._key(method, function, query, payload), \
+                self._tags(payload, query)
+        if function in WRITE_FUNCTIONS:
+            return 'write', None, self._write_tags(function, payload)
+        return 'pass', None, ()
+
+    @staticmethod
+    def _key(method, function, query, payload):
+        canonical = json.dumps(payload, sort_keys=True, separators=(',', ':'))
+        return hashlib.sha1(f'{method} {function}?{query} {canonical}'.encode()).hexdigest()
+
+    @staticmethod
+    def _tags(payload, query):
+        tags = {str(payload[f]) for f in ENTITY_FIELDS if payload.get(f)}
+        for part in (query or '').split('&'):
+            name, _, value = part.partition('=')
+            if name in ENTITY_FIELDS and value:
+                tags.add(value)
+        return tuple(tags) or (GLOBAL_TAG,)
+
+    @staticmethod
+    def _write_tags(function, payload):
+        return tuple(str(payload[f]) for f in WRITE_FUNCTIONS.get(function, ())
+                     if payload.get(f))
+
+    def invalidate(self, tags):
+        dropped = 0
+        with self._lock:
+            for tag in tags + (GLOBAL_TAG,):
+                self._generations[tag] = self._generations.get(tag, 0) + 1
+        for tag in tags + (GLOBAL_TAG,):
+            dropped += self.cache.invalidate(tag)
+        return dropped
+
+    def _generation(self, tags):
+        with self._lock:
+            return tuple(self._generations.get(t, 0) for t in tags)
+
+    def handle(self, method, function, query, body, headers):
+        """Return (status, content_type, body, cache_status)"""
+        started = time.perf_counter()
+        kind, key, tags = self.classify(method, function, query, body)
+
+        if kind != 'read':
+            result = self.upstream(method, function, query, body, headers)
+            if kind == 'write' and 200 <= result[0] < 300:
+                self.invalidate(tags)
+            with self._lock:
+                self.counts['passthrough'] += 1
+                self.passthrough_latency.observe(time.perf_counter() - started)
+            return result + ('BYPASS',)
+
+        cached = self.cache.get(key)
+        if cached is not None:
+            with self._lock:
+                self.counts['hits'] += 1
+                self.hit_latency.observe(time.perf_counter() - started)
+            return cached + ('HIT',)
+
+        with self._lock:
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[key] = _Flight()
+
+        if not leader:
+            flight.event.wait()
+            with self._lock:
+                self.counts['coalesced'] += 1
+                self.hit_latency.observe(time.perf_counter() - started)
+            return flight.result + ('COALESCED',)
+
+        generation = self._generation(tags)
+        try:
+            result = self.upstream(method, function, query, body, headers)
+            # Skip the fill if a write invalidated these entities meanwhile
+            if result[0] == 200 and self._generation(tags) == generation:
+                self.cache.put(key, result, tags)
+            flight.result = result
+        except Exception as e:
+            flight.result = (502, 'application/json',
+                             json.dumps({'error': f'upstream failed: {e}'}).encode())
+        finally:
+            with self._lock:
+                del self._inflight[key]
+                self.counts['misses'] += 1
+                self.miss_latency.observe(time.perf_counter() - started)
+            flight.event.set()
+        return flight.result + ('MISS',)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.counts['hits'] + self.counts['misses'] + self.counts['coalesced']
+            served = self.counts['hits'] + self.counts['coalesced']
+            return {
+                **self.counts,
+                'hit_rate': served / lookups if lookups else 0.0,
+                'entries': len(self.cache),
+                'evictions': self.cache.evictions,
+                'invalidations': self.cache.invalidations,
+                'latency': {
+                    'hit': self.hit_latency.to_dict(),
+                    'miss': self.miss_latency.to_dict(),
+                    'passthrough': self.passthrough_latency.to_dict(),
+                },
+            }
+
+
+def http_upstream(base_url, timeout=60):
+    """Upstream callable forwarding to <base_url>/functions/v1/<function>"""
+    base_url = base_url.rstrip('/')
+
+    def call(method, function, query, body, headers):
+        url = f'{base_url}/functions/v1/{function}' + (f'?{query}' if query else '')
+        req = urllib.request.Request(url, data=body if method != 'GET' else None,
+                                     headers=headers, method=method)
+        try:
+            with urllib.request.urlopen(req, timeout=timeout) as response:
+                return (response.status, response.headers.get('Content-Type', 'application/json'),
+                        response.read())
+        except urllib.error.HTTPError as e:
+            return e.code, e.headers.get('Content-Type', 'application/json'), e.read()
+
+    return call
+
+
+def make_handler(proxy):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+        # Headers and body are separate small writes; with Nagle on, the body
+        # waits for the client's delayed ACK (~40 ms on Linux)
+        disable_nagle_algorithm = True
+
+        def log_message(self, fmt, *args):
+            pass
+
+        def _send(self, status, content_type, body, cache_status=None):
+            self.send_response(status)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+            self.send_header('Access-Control-Allow-Origin', '*')
+            if cache_status:
+                self.send_header('X-Cache', cache_status)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _json(self, status, payload):
+            self._send(status, 'application/json', json.dumps(payload, indent=2).encode())
+
+        def _dispatch(self):
+            path, _, query = self.path.partition('?')
+            length = int(self.headers.get('Content-Length') or 0)
+            body = self.rfile.read(length) if length else b''
+
+            if path == '/_proxy/stats':
+                return self._json(200, proxy.stats())
+            if path.startswith('/_proxy/cache') and self.command == 'DELETE':
+                entity = path[len('/_proxy/cache'):].strip('/')
+                dropped = proxy.invalidate((entity,)) if entity else proxy.cache.clear()
+                return self._json(200, {'dropped': dropped})
+
+            prefix = '/functions/v1/'
+            if not path.startswith(prefix):
+                return self._json(404, {'error': f'unknown path {path}'})
+            function = path[len(prefix):].strip('/')
+            headers = {k: v for k, v in self.headers.items() if k.lower() in FORWARDED_HEADERS}
+            status, content_type, payload, cache_status = proxy.handle(
+                self.command, function, query, body, headers)
+            self._send(status, content_type, payload, cache_status)
+
+        def do_OPTIONS(self):
+            self.send_response(200)
+            self.send_header('Access-Control-Allow-Origin', '*')
+            self.send_header('Access-Control-Allow-Headers',
+                             'authorization, x-client-info, apikey, content-type')
+            self.send_header('Access-Control-Allow-Methods', 'GET, POST, DELETE, OPTIONS')
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+
+        do_GET = do_POST = do_DELETE = _dispatch
+
+    return Handler
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Caching proxy for phi-ql-query')
+    parser.add_argument('--upstream',
+                        default=os.environ.get('SUPABASE_URL', 'http://localhost:54321'),
+                        help='Supabase (or standin_backend.py) base URL')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8787)
+    parser.add_argument('--max-entries', type=int, default=1024)
+    parser.add_argument('--ttl', type=float, default=300.0, help='seconds')
+    args = parser.parse_args(argv)
+
+    proxy = CachingProxy(http_upstream(args.upstream), args.max_entries, args.ttl)
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(proxy))
+    print(f"Proxying {args.upstream} on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(json.dumps(proxy.stats(), indent=2), file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Materialized transitive closure of pis_provenance.was_derived_from.
+
+New provenance rows (written by npe-pis-validate and adversarial-loop) are
+read past a generated_at watermark and folded into a local SQLite closure
+index one derivation edge at a time: linking child <- parent adds every
+(ancestor of parent, descendant of child) pair, keeping the shortest depth.
+Changed pairs are then published to the pis_provenance_closure table, where
+the trace_provenance RPC (migration 1762800300) returns an entity's whole
+ancestry and progeny in one indexed read.
+
+Provenance rows are append-only; run with --full after deleting any.
+"""
+
+import argparse
+import json
+import sqlite3
+import sys
+import time
+
+from metrics import METRICS
+from supabase_rest import DEFAULT_PAGE_SIZE, SupabaseRest
+
+DEFAULT_INDEX = 'provenance_closure.sqlite'
+CLOSURE_TABLE = 'pis_provenance_closure'
+PUBLISH_CHUNK = 1000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS edges (
+    child TEXT NOT NULL, parent TEXT NOT NULL, PRIMARY KEY (child, parent));
+CREATE TABLE IF NOT EXISTS closure (
+    ancestor TEXT NOT NULL, descendant TEXT NOT NULL, depth INTEGER NOT NULL,
+    PRIMARY KEY (ancestor, descendant));
+CREATE INDEX IF NOT EXISTS closure_descendant ON closure (descendant, depth);
+-- Pairs changed locally but not yet published to pis_provenance_closure
+CREATE TABLE IF NOT EXISTS pending (
+    ancestor TEXT NOT NULL, descendant TEXT NOT NULL, PRIMARY KEY (ancestor, descendant));
+"""
+
+
+class ClosureIndex:
+    """Closure table in SQLite; every lookup is a single primary-key range scan"""
+
+    def __init__(self, path):
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript(SCHEMA)
+
+    def get_meta(self, key):
+        row = self.conn.execute('SELECT value FROM meta WHERE key = ?', (key,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def set_meta(self, key, value):
+        self.conn.execute('INSERT OR REPLACE INTO meta VALUES (?, ?)', (key, json.dumps(value)))
+
+    def clear(self):
+        with self.conn:
+            for table in ('meta', 'edges', 'closure', 'pending'):
+                self.conn.execute(f'DELETE FROM {table}')
+
+    def ancestors(self, entity_id):
+        return self.conn.execute('SELECT ancestor, depth FROM closure WHERE descendant = ? '
+                                 'ORDER BY depth', (entity_id,)).fetchall()
+
+    def descendants(self, entity_id):
+        return self.conn.execute('SELECT descendant, depth FROM closure WHERE ancestor = ? '
+                                 'ORDER BY depth', (entity_id,)).fetchall()
+
+    def add_edge(self, child, parent):
+        """Record child <- parent; returns the number of closure pairs touched"""
+        if child == parent:
+            return 0
+        cursor = self.conn.execute('INSERT OR IGNORE INTO edges VALUES (?, ?)', (child, parent))
+        if not cursor.rowcount:
+            return 0
+        above = [(parent, 0)] + self.ancestors(parent)
+        below = [(child, 0)] + self.descendants(child)
+        pairs = [(a, d, da + 1 + dd) for a, da in above for d, dd in below if a != d]
+        self.conn.executemany(
+            'INSERT INTO closure VALUES (?, ?, ?) ON CONFLICT (ancestor, descendant) '
+            'DO UPDATE SET depth = min(depth, excluded.depth)', pairs)
+        self.conn.executemany('INSERT OR IGNORE INTO pending VALUES (?, ?)',
+                              [(a, d) for a, d, _ in pairs])
+        return len(pairs)
+
+    def pending(self, limit):
+        return self.conn.execute(
+            'SELECT c.ancestor, c.descendant, c.depth FROM pending p '
+            'JOIN closure c ON c.ancestor = p.ancestor AND c.descendant = p.descendant '
+            'LIMIT ?', (limit,)).fetchall()
+
+    def mark_published(self, pairs):
+        with self.conn:
+            self.conn.executemany('DELETE FROM pending WHERE ancestor = ? AND descendant = ?',
+                                  [(a, d) for a, d, _ in pairs])
+
+    def trace(self, entity_id):
+        return {
+            'entity_id': entity_id,
+            'ancestors': [{'entity_id': a, 'depth': d} for a, d in self.ancestors(entity_id)],
+            'descendants': [{'entity_id': a, 'depth': d}
+                            for a, d in self.descendants(entity_id)],
+        }
+
+
+def apply_new_provenance(client, index, page_size=DEFAULT_PAGE_SIZE):
+    """Fold provenance rows past the watermark into the index"""
+    since = index.get_meta('watermark')
+    rows = edges = pairs = 0
+    for page in client.iter_pages('pis_provenance',
+                                  columns='id,entity_id,was_derived_from,generated_at',
+                                  watermark_column='generated_at',
+                                  since=tuple(since) if since else None,
+                                  page_size=page_size):
+        with METRICS.span('closure_apply_page'):
+            # Edges and watermark commit together, so a crash never skips rows
+            with index.conn:
+                for row in page:
+                    for parent in row.get('was_derived_from') or []:
+                        touched = index.add_edge(row['entity_id'], parent)
+                        edges += 1 if touched else 0
+                        pairs += touched
+                last = page[-1]
+                index.set_meta('watermark', [last['generated_at'], last['id']])
+        rows += len(page)
+        METRICS.incr('rows_read', len(page))
+    return rows, edges, pairs
+
+
+def publish(client, index, replace=False):
+    """Upsert changed pairs into pis_provenance_closure"""
+    if replace:
+        client.delete(CLOSURE_TABLE, {'ancestor_id': 'not.is.null'})
+    published = 0
+    while True:
+        pairs = index.pending(PUBLISH_CHUNK)
+        if not pairs:
+            return published
+        with METRICS.span('closure_publish_chunk'):
+            client.insert(CLOSURE_TABLE, [
+                {'ancestor_id': a, 'descendant_id': d, 'depth': depth} for a, d, depth in pairs
+            ], upsert=True, on_conflict='ancestor_id,descendant_id')
+        index.mark_published(pairs)
+        published += len(pairs)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Maintain the pis_provenance closure')
+    parser.add_argument('--index', default=DEFAULT_INDEX, help='local SQLite closure index')
+    parser.add_argument('--full', action='store_true',
+                        help='rebuild from scratch and replace the published table')
+    parser.add_argument('--local-only', action='store_true',
+                        help=f'update the local index without publishing to {CLOSURE_TABLE}')
+    parser.add_argument('--trace', metavar='ENTITY_ID',
+                        help='print ancestors/descendants from the local index')
+    parser.add_argument('--page-size', type=int, default=DEFAULT_PAGE_SIZE)
+    args = parser.parse_args(argv)
+
+    index = ClosureIndex(args.index)
+    if args.trace:
+        print(json.dumps(index.trace(args.trace), indent=2))
+        return
+
+    client = SupabaseRest()
+    started = time.perf_counter()
+    try:
+        if args.full:
+            index.clear()
+        rows, edges, pairs = apply_new_provenance(client, index, args.page_size)
+        published = 0 if args.local_only else publish(client, index, replace=args.full)
+    except Exception as e:
+        print(f"✗ Closure refresh failed: {e}", file=sys.stderr)
+        sys.exit(1)
+    print(f"✓ Read {rows} provenance rows, added {edges} derivation edges, "
+          f"{pairs} closure pairs touched, {published} published "
+          f"({time.perf_counter() - started:.2f}s)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+"""
+Worker daemon that drains queued file_processing_sessions.
+
+Sessions are claimed in batches through the claim_file_processing_sessions
+RPC (FOR UPDATE SKIP LOCKED, see migration 1762800000), falling back to a
+conditional PATCH on processing_status when the RPC is not deployed. Each
+claim takes a lease that is renewed before every step; sessions whose
+worker died are reclaimed once the lease expires, and a worker that finds
+its lease taken over abandons the session instead of processing it twice.
+A failed session is re-queued with an exponential backoff (available_at,
+migration 1762800600) until it runs out of attempts. Run more daemons to
+scale out.
+"""
+
+import argparse
+import os
+import re
+import signal
+import socket
+import sys
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+from metrics import METRICS
+from supabase_rest import SupabaseError, SupabaseRest
+
+CLAIM_RPC = 'claim_file_processing_sessions'
+MAX_CONCEPTS_PER_FILE = 3
+MAX_ATTEMPTS = 3
+MIN_LEASE_SECONDS = 30
+RETRY_BASE_SECONDS = 30
+RETRY_MAX_SECONDS = 3600
+
+
+class LeaseLost(Exception):
+    """Another worker reclaimed the session after our lease expired"""
+
+
+def _now():
+    return datetime.now(timezone.utc)
+
+
+def _iso(dt):
+    return dt.isoformat()
+
+
+def retry_delay(attempts):
+    """Seconds before a session that failed on attempt `attempts` may run again"""
+    return min(RETRY_BASE_SECONDS * 2 ** max(attempts - 1, 0), RETRY_MAX_SECONDS)
+
+
+def extract_concepts(text):
+    """Mirror process-file-content: first sentences longer than 10 chars"""
+    flattened = re.sub(r'\n+', ' ', text)
+    sentences = [s.strip() for s in re.split(r'[.!?]+', flattened)]
+    sentences = [s for s in sentences if len(s) > 10]
+    if not sentences:
+        return [(text, 'DOCUMENT', 0.6)] if text else []
+    return [(s, f'CONCEPT-{i + 1}', 0.8)
+            for i, s in enumerate(sentences[:MAX_CONCEPTS_PER_FILE])]
+
+
+class SessionWorker:
+    def __init__(self, client, worker_id=None, batch_size=10, concurrency=4,
+                 lease_seconds=300, poll_interval=5.0):
+        self.client = client
+        self.worker_id = worker_id or f'{socket.gethostname()}-{os.getpid()}'
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self.use_rpc = True
+        self.stopping = False
+
+    # -- claiming ---------------------------------------------------------
+
+    def claim(self):
+        if self.use_rpc:
+            try:
+                return self.client.rpc(CLAIM_RPC, {
+                    'worker_id': self.worker_id,
+                    'batch_size': self.batch_size,
+                    'lease_seconds': self.lease_seconds,
+                }) or []
+            except SupabaseError as e:
+                if e.status != 404:
+                    raise
+                print(f"{CLAIM_RPC} not found; falling back to conditional PATCH claims",
+                      file=sys.stderr)
+                self.use_rpc = False
+        return self._claim_by_patch()
+
+    def _claim_by_patch(self):
+        now = _now()
+        candidates = self.client.select('file_processing_sessions', {
+            'select': 'id,processing_status,lease_expires_at,attempts',
+            'or': f'(and(processing_status.eq.queued,'
+                  f'or(available_at.is.null,available_at.lte."{_iso(now)}")),'
+                  f'and(processing_status.eq.processing,lease_expires_at.lt."{_iso(now)}"))',
+            'order': 'created_at.asc',
+            'limit': str(self.batch_size),
+        })
+        claimed = []
+        for row in candidates:
+            # The filter on the old status/lease makes the PATCH a compare-and-set:
+            # only one worker's update can match the row
+            filters = {'id': f"eq.{row['id']}",
+                       'processing_status': f"eq.{row['processing_status']}"}
+            if row.get('lease_expires_at'):
+                filters['lease_expires_at'] = f"eq.{row['lease_expires_at']}"
+            patch = {
+                'processing_status': 'processing',
+                'claimed_by': self.worker_id,
+                'lease_expires_at': _iso(now + timedelta(seconds=self.lease_seconds)),
+                'attempts': (row.get('attempts') or 0) + 1,
+                'started_at': _iso(now),
+            }
+            updated = self.client.update('file_processing_sessions', filters, patch,
+                                         returning=True)
+            if updated:
+                claimed.extend(updated)
+        return claimed
+
+    # -- processing -------------------------------------------------------
+
+    def process(self, session):
+        started = time.perf_counter()
+        steps = list(session.get('processing_steps') or [])
+
+        def run_step(name, fn):
+            self._renew(session)
+            step_started = time.perf_counter()
+            try:
+                with METRICS.span(f'step_{name}'):
+                    result = fn()
+            except Exception:
+                steps.append({'step': name, 'status': 'failed', 'timestamp': _iso(_now()),
+                              'duration_ms': round((time.perf_counter() - step_started) * 1000)})
+                raise
+            status = 'skipped' if result is None else 'completed'
+            steps.append({'step': name, 'status': status, 'timestamp': _iso(_now()),
+                          'duration_ms': round((time.perf_counter() - step_started) * 1000),
+                          'worker': self.worker_id})
+            return result
+
+        file_id = session['file_id']
+        try:
+            existing = self.client.select('file_rpe_relationships', {
+                'select': 'id', 'file_id': f'eq.{file_id}', 'limit': '1'})
+            text = run_step('content_extraction', lambda: self._load_text(file_id))
+            if existing:
+                # Already processed inline by process-file-content
+                run_step('rpe_generation', lambda: None)
+                run_step('relationship_creation', lambda: None)
+            else:
+                rpes = run_step('rpe_generation', lambda: self._create_rpes(text))
+                run_step('relationship_creation', lambda: self._link(file_id, rpes))
+            self._finish(session, steps, started, 'completed')
+            METRICS.incr('sessions_completed')
+        except LeaseLost:
+            METRICS.incr('sessions_abandoned')
+            print(f"✗ Session {session['id']}: lease lost to another worker", file=sys.stderr)
+        except Exception as e:
+            retry = (session.get('attempts') or 1) < MAX_ATTEMPTS
+            METRICS.incr('sessions_retried' if retry else 'sessions_failed')
+            print(f"✗ Session {session['id']}: {e}", file=sys.stderr)
+            try:
+                self._finish(session, steps, started, 'queued' if retry else 'failed', str(e))
+            except Exception as finish_error:
+                # The lease expires and the session is reclaimed; keep the daemon alive
+                print(f"✗ Session {session['id']}: could not record failure: {finish_error}",
+                      file=sys.stderr)
+
+    def _load_text(self, file_id):
+        rows = self.client.select('file_content', {
+            'select': 'extracted_text', 'file_id': f'eq.{file_id}', 'limit': '1'})
+        if not rows:
+            raise ValueError('No file content found')
+        return rows[0].get('extracted_text') or ''
+
+    def _create_rpes(self, text):
+        stamp = int(time.time() * 1000)
+        entities = [{
+            'entity_id': f'RPE-{stamp}-{suffix}-{uuid.uuid4().hex[:6]}',
+            'name': concept[:100],
+            'core_fracture': concept,
+            'transcendence_score': score,
+            'recursion_depth': 1,
+            'void_vectors': {},
+            'aporia_markers': [],
+            'pis_validation_status': 'pending',
+            'pis_validation_summary': 'Auto-generated from file processing',
+        } for concept, suffix, score in extract_concepts(text)]
+        if not entities:
+            return []
+        return self.client.insert('rpes', entities, returning=True) or []
+
+    def _link(self, file_id, rpes):
+        relationships = [{
+            'file_id': file_id,
+            'rpe_id': rpe['id'],
+            'relationship_type': 'contains',
+            'relationship_strength': 0.8,
+            'confidence_score': 0.8,
+            'context_text': (rpe.get('core_fracture') or '')[:200],
+        } for rpe in rpes]
+        if relationships:
+            self.client.insert('file_rpe_relationships', relationships)
+        return relationships
+
+    def _renew(self, session):
+        """Extend our lease; raises LeaseLost if the session is no longer ours"""
+        renewed = self.client.update(
+            'file_processing_sessions',
+            {'id': f"eq.{session['id']}", 'claimed_by': f'eq.{self.worker_id}',
+             'processing_status': 'eq.processing'},
+            {'lease_expires_at': _iso(_now() + timedelta(seconds=self.lease_seconds))},
+            returning=True)
+        if not renewed:
+            raise LeaseLost(session['id'])
+
+    def _finish(self, session, steps, started, status, error=None):
+        elapsed_ms = round((time.perf_counter() - started) * 1000)
+        METRICS.observe('session_processing', elapsed_ms / 1000)
+        patch = {
+            'processing_status': status,
+            'processing_steps': steps,
+            'processing_time_ms': elapsed_ms,
+            'error_message': error,
+            'lease_expires_at': None,
+            'available_at': None,
+        }
+        if status == 'queued':
+            delay = retry_delay(session.get('attempts') or 1)
+            patch['available_at'] = _iso(_now() + timedelta(seconds=delay))
+        if status in ('completed', 'failed'):
+            patch['completed_at'] = _iso(_now())
+        # Only write back while we still own the claim
+        self.client.update('file_processing_sessions',
+                           {'id': f"eq.{session['id']}", 'claimed_by': f'eq.{self.worker_id}'},
+                           patch)
+
+    # -- main loop --------------------------------------------------------
+
+    def run(self, once=False):
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            while not self.stopping:
+                try:
+                    with METRICS.span('claim'):
+                        sessions = self.claim()
+                except Exception as e:
+                    print(f"✗ Claim failed: {e}", file=sys.stderr)
+                    sessions = []
+
+                if sessions:
+                    METRICS.incr('sessions_claimed', len(sessions))
+                    list(pool.map(self.process, sessions))
+                    print(f"Processed {len(sessions)} sessions")
+                    continue
+                if once:
+                    break
+                time.sleep(self.poll_interval)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Drain queued file_processing_sessions')
+    parser.add_argument('--batch-size', type=int, default=10)
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--lease-seconds', type=int, default=300)
+    parser.add_argument('--poll-interval', type=float, default=5.0)
+    parser.add_argument('--worker-id')
+    parser.add_argument('--once', action='store_true', help='exit when the queue is empty')
+    args = parser.parse_args(argv)
+    if args.lease_seconds < MIN_LEASE_SECONDS:
+        # Each step must finish inside one lease or the session is reclaimed mid-step
+        parser.error(f'--lease-seconds must be at least {MIN_LEASE_SECONDS}')
+
+    worker = SessionWorker(SupabaseRest(), worker_id=args.worker_id,
+                           batch_size=args.batch_size, concurrency=args.concurrency,
+                           lease_seconds=args.lease_seconds, poll_interval=args.poll_interval)
+
+    def stop(signum, frame):
+        print("Stopping after current batch...")
+        worker.stopping = True
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    print(f"Worker {worker.worker_id} started")
+    worker.run(once=args.once)
+
+
+if __name__ == '__main__':
+    main()
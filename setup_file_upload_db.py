@@ -4,11 +4,14 @@ Setup script for File Upload System database tables and storage bucket.
 Uses Supabase REST API with service role key to bypass token expiration issues.
 """
 
-import requests
+import argparse
 import json
+import os
 import sys
 
-SUPABASE_URL = "https://jmaxcgoooguzmcnnanfb.supabase.co"
+from supabase_rest import DEFAULT_SUPABASE_URL
+
+SUPABASE_URL = os.environ.get('SUPABASE_URL', DEFAULT_SUPABASE_URL).rstrip('/')
 
 def get_service_role_key():
     """Prompt for service role key."""
@@ -26,6 +29,8 @@ def get_service_role_key():
 
 def execute_sql(sql_query, service_key):
     """Execute SQL using Supabase REST API."""
+    import requests
+
     url = f"{SUPABASE_URL}/rest/v1/rpc/query"
     headers = {
         'Authorization': f'Bearer {service_key}',
@@ -304,7 +309,9 @@ def create_storage_bucket():
     print(json.dumps(config, indent=2))
     print("\n[Note: Or create via API using service role key]")
 
-def main():
+def main(argv=None):
+    argparse.ArgumentParser(description='Print the File Upload System setup SQL').parse_args(argv)
+
     print("\n" + "=" * 60)
     print("FILE UPLOAD SYSTEM - DATABASE SETUP GUIDE")
     print("=" * 60)
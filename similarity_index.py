@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+"""
+TF-IDF similarity index that generates knowledge_graph edges by content.
+
+RPE documents are `name` + `core_fracture`; training_corpus source texts
+only contribute to document frequencies so rare philosophical vocabulary
+is weighted sensibly even with few RPEs. Top-k neighbours come from
+blocked sparse matrix products, so memory stays bounded by the block size
+rather than N^2.
+
+    python similarity_index.py build     # full rebuild, replaces existing edges
+    python similarity_index.py update    # only RPEs since last run
+
+`update` grows the vocabulary and document frequencies with the new RPEs;
+rows already in the index keep the IDF weights they were built with, so
+rebuild now and then once the corpus has drifted.
+"""
+
+import argparse
+import json
+import math
+import re
+import sys
+from collections import Counter
+from pathlib import Path
+
+import numpy as np
+from scipy import sparse
+
+from metrics import METRICS
+from supabase_rest import SupabaseRest
+
+RELATIONSHIP_TYPE = 'content_similarity'
+DEFAULT_INDEX_PATH = 'similarity_index'
+INSERT_BATCH_SIZE = 500
+DELETE_BATCH_SIZE = 200
+
+TOKEN_RE = re.compile(r"[a-z][a-z\-']{2,}")
+STOPWORDS = frozenset("""
+    the and for are but not you all any can had her was one our out has him his how its may
+    new now old see two way who did get let say she too use that with have this will your from
+    they know want been good much some time very when come here just like long make many more
+    only over such take than them well were what into also each which their there these those
+    then would could should about after again being between both does doing down during few
+    further itself most other same own while where whom why because before below above under
+    until upon within without through itself himself herself themselves
+""".split())
+
+
+def tokenize(text):
+    return [t for t in TOKEN_RE.findall((text or '').lower()) if t not in STOPWORDS]
+
+
+def rpe_text(row):
+    return f"{row.get('name') or ''} {row.get('core_fracture') or ''}"
+
+
+class SimilarityIndex:
+    """Vocabulary, document frequencies and L2-normalized TF-IDF rows per RPE"""
+
+    def __init__(self, vocab=None, df=None, n_docs=0, ids=None, matrix=None, watermark=None):
+        self.vocab = vocab or {}
+        self.df = df if df is not None else np.zeros(0, dtype=np.int64)
+        self.n_docs = n_docs
+        self.ids = ids or []
+        self.matrix = matrix if matrix is not None else sparse.csr_matrix((0, len(self.vocab)))
+        self.watermark = watermark
+
+    @classmethod
+    def fit(cls, rpe_rows, background_texts=()):
+        """Build vocabulary and IDF from RPEs plus background texts"""
+        index = cls()
+        with METRICS.span('tfidf_fit'):
+            index.count_documents(background_texts)
+        index.add(rpe_rows)
+        return index
+
+    def count_documents(self, texts):
+        """Fold texts into the document frequencies, adding unseen terms.
+
+        New terms get zero columns in the existing rows, so the matrix keeps
+        one column per vocabulary entry.
+        """
+        df_counts = Counter()
+        n_docs = 0
+        for text in texts:
+            df_counts.update(set(tokenize(text)))
+            n_docs += 1
+
+        new_terms = sorted(t for t in df_counts if t not in self.vocab)
+        if new_terms:
+            for term in new_terms:
+                self.vocab[term] = len(self.vocab)
+            self.df = np.concatenate([self.df, np.zeros(len(new_terms), dtype=np.int64)])
+            self.matrix = sparse.csr_matrix(
+                (self.matrix.data, self.matrix.indices, self.matrix.indptr),
+                shape=(self.matrix.shape[0], len(self.vocab)))
+        for term, count in df_counts.items():
+            self.df[self.vocab[term]] += count
+        self.n_docs += n_docs
+        return len(new_terms)
+
+    @property
+    def idf(self):
+        return np.log((1 + self.n_docs) / (1 + self.df)) + 1.0
+
+    def vectorize(self, texts):
+        """Sparse L2-normalized TF-IDF rows; unknown terms are ignored"""
+        indptr = [0]
+        indices = []
+        data = []
+        for text in texts:
+            counts = Counter(self.vocab[t] for t in tokenize(text) if t in self.vocab)
+            indices.extend(counts.keys())
+            data.extend(1.0 + math.log(c) for c in counts.values())
+            indptr.append(len(indices))
+
+        matrix = sparse.csr_matrix(
+            (np.asarray(data, dtype=np.float32), np.asarray(indices, dtype=np.int32),
+             np.asarray(indptr, dtype=np.int64)),
+            shape=(len(indptr) - 1, len(self.vocab)),
+        )
+        matrix = matrix.multiply(self.idf.astype(np.float32)).tocsr()
+        norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+        norms[norms == 0] = 1.0
+        return sparse.diags(1.0 / norms).dot(matrix).astype(np.float32).tocsr()
+
+    def add(self, rpe_rows):
+        """Append RPE rows to the index and return their row offsets"""
+        rpe_rows = list(rpe_rows)
+        if not rpe_rows:
+            return range(0)
+        start = len(self.ids)
+        texts = [rpe_text(r) for r in rpe_rows]
+        with METRICS.span('tfidf_vectorize'):
+            self.count_documents(texts)
+            vectors = self.vectorize(texts)
+        self.matrix = sparse.vstack([self.matrix, vectors]).tocsr()
+        self.ids.extend(r['id'] for r in rpe_rows)
+        last = rpe_rows[-1]
+        if 'created_at' in last:
+            self.watermark = [last['created_at'], last['id']]
+        return range(start, len(self.ids))
+
+    def neighbours(self, rows, k=5, min_similarity=0.1, block_size=512):
+        """Yield (row, neighbour_row, cosine) for the top-k neighbours of `rows`.
+
+        Similarities are computed a block of query rows at a time against the
+        whole index; only the sparse product for that block is materialized.
+        """
+        rows = np.asarray(list(rows), dtype=np.int64)
+        corpus_t = self.matrix.T.tocsc()
+        for start in range(0, len(rows), block_size):
+            block = rows[start:start + block_size]
+            with METRICS.span('tfidf_block_product'):
+                scores = (self.matrix[block] @ corpus_t).tocsr()
+            for offset, row in enumerate(block):
+                lo, hi = scores.indptr[offset], scores.indptr[offset + 1]
+                cols = scores.indices[lo:hi]
+                vals = scores.data[lo:hi]
+                keep = (cols != row) & (vals >= min_similarity)
+                cols, vals = cols[keep], vals[keep]
+                if len(vals) > k:
+                    top = np.argpartition(-vals, k)[:k]
+                    cols, vals = cols[top], vals[top]
+                for j in np.argsort(-vals):
+                    yield int(row), int(cols[j]), float(vals[j])
+
+    def save(self, path):
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        sparse.save_npz(path / 'matrix.npz', self.matrix)
+        np.save(path / 'df.npy', self.df)
+        with open(path / 'index.json', 'w') as f:
+            json.dump({'vocab': self.vocab, 'n_docs': self.n_docs, 'ids': self.ids,
+                       'watermark': self.watermark}, f)
+
+    @classmethod
+    def load(cls, path):
+        path = Path(path)
+        with open(path / 'index.json', 'r') as f:
+            meta = json.load(f)
+        return cls(vocab=meta['vocab'], df=np.load(path / 'df.npy'), n_docs=meta['n_docs'],
+                   ids=meta['ids'], matrix=sparse.load_npz(path / 'matrix.npz').tocsr(),
+                   watermark=meta['watermark'])
+
+
+def edges_for(index, rows, k, min_similarity):
+    """Turn neighbour triples into knowledge_graph rows, one per unordered pair"""
+    seen = set()
+    for i, j, score in index.neighbours(rows, k=k, min_similarity=min_similarity):
+        pair = (min(i, j), max(i, j))
+        if pair in seen:
+            continue
+        seen.add(pair)
+        yield {
+            'source_entity_id': index.ids[i],
+            'target_entity_id': index.ids[j],
+            'relationship_type': RELATIONSHIP_TYPE,
+            'relationship_strength': round(min(score, 1.0) * 10, 1),
+            'description': f'TF-IDF cosine similarity {score:.3f} between core fractures',
+        }
+
+
+def write_edges(client, edges):
+    batch = []
+    written = 0
+    for edge in edges:
+        batch.append(edge)
+        if len(batch) >= INSERT_BATCH_SIZE:
+            client.insert('knowledge_graph', batch)
+            written += len(batch)
+            batch = []
+    if batch:
+        client.insert('knowledge_graph', batch)
+        written += len(batch)
+    METRICS.incr('edges_written', written)
+    return written
+
+
+def existing_edge_ids(client):
+    ids = []
+    for page in client.iter_pages('knowledge_graph', columns='id', watermark_column='id',
+                                  filters={'relationship_type': f'eq.{RELATIONSHIP_TYPE}'}):
+        ids.extend(row['id'] for row in page)
+    return ids
+
+
+def fetch_rpes(client, since=None):
+    rows = []
+    for page in client.iter_pages('rpes', columns='id,name,core_fracture,created_at',
+                                  since=since):
+        rows.extend(page)
+    return rows
+
+
+def fetch_corpus_texts(client):
+    for page in client.iter_pages('training_corpus', columns='id,source_text,created_at'):
+        for row in page:
+            yield row.get('source_text') or ''
+
+
+def build(client, index_path, k, min_similarity, replace):
+    rpes = fetch_rpes(client)
+    print(f"Fetched {len(rpes)} RPEs")
+    index = SimilarityIndex.fit(rpes, fetch_corpus_texts(client))
+    print(f"Vocabulary: {len(index.vocab)} terms over {index.n_docs} documents")
+
+    # Old edges are only removed once the new set is fully written, so readers
+    # never see an empty or half-built graph; a failed build leaves the old
+    # edges (plus a partial new set, removed by the next build) in place
+    stale = existing_edge_ids(client) if replace else []
+    written = write_edges(client, edges_for(index, range(len(index.ids)), k, min_similarity))
+    for i in range(0, len(stale), DELETE_BATCH_SIZE):
+        client.delete('knowledge_graph',
+                      {'id': f"in.({','.join(stale[i:i + DELETE_BATCH_SIZE])})"})
+    if stale:
+        print(f"Removed {len(stale)} previous {RELATIONSHIP_TYPE} edges")
+    index.save(index_path)
+    print(f"✓ Wrote {written} edges; index saved to {index_path}/")
+
+
+def update(client, index_path, k, min_similarity):
+    index = SimilarityIndex.load(index_path)
+    new_rpes = fetch_rpes(client, since=tuple(index.watermark) if index.watermark else None)
+    if not new_rpes:
+        print("No new RPEs since last run")
+        return
+    rows = index.add(new_rpes)
+    written = write_edges(client, edges_for(index, rows, k, min_similarity))
+    index.save(index_path)
+    print(f"✓ Indexed {len(new_rpes)} new RPEs, wrote {written} edges")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='TF-IDF knowledge_graph edge generator')
+    parser.add_argument('command', choices=['build', 'update'])
+    parser.add_argument('--index', default=DEFAULT_INDEX_PATH, help='local index directory')
+    parser.add_argument('-k', type=int, default=5, help='neighbours per RPE')
+    parser.add_argument('--min-similarity', type=float, default=0.1)
+    parser.add_argument('--replace', action=argparse.BooleanOptionalAction, default=True,
+                        help=f'delete existing {RELATIONSHIP_TYPE} edges before a rebuild '
+                             f'(knowledge_graph has no unique constraint, so keeping them '
+                             f'duplicates every edge)')
+    args = parser.parse_args(argv)
+
+    client = SupabaseRest()
+    try:
+        if args.command == 'build':
+            build(client, args.index, args.k, args.min_similarity, args.replace)
+        else:
+            update(client, args.index, args.k, args.min_similarity)
+    except FileNotFoundError:
+        print(f"ERROR: no index at {args.index}/ - run 'build' first", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the Supabase edge functions.
+
+Serves /functions/v1/<name> from in-memory data with the same request and
+response shapes as the Deno functions, plus a configurable artificial
+latency, so the caching proxy and load tests can run with no network or
+Supabase project:
+
+    python standin_backend.py --port 54321 --latency-ms 40
+"""
+
+import argparse
+import email.parser
+import email.policy
+import json
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class StandinState:
+    """Tiny in-memory PIS/RPE dataset shared by all handlers"""
+
+    def __init__(self, theses=20, rpes=50, seed=314):
+        rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.theses = {str(uuid.UUID(int=rng.getrandbits(128))): {
+            'statement': f'Thesis {i}: the void is the ground of every placeholder',
+            'status': 'unverified'} for i in range(theses)}
+        for thesis_id, thesis in self.theses.items():
+            thesis['id'] = thesis_id
+        self.rpes = [{'id': str(uuid.UUID(int=rng.getrandbits(128))),
+                      'entity_id': f'RPE-{i:04d}', 'name': f'Concept {i}',
+                      'transcendence_score': round(rng.uniform(0, 10), 1)}
+                     for i in range(rpes)]
+        self.edges = [{'source': rng.choice(self.rpes)['id'], 'target': rng.choice(self.rpes)['id'],
+                       'type': 'philosophical_resonance', 'strength': 5.0}
+                      for _ in range(rpes * 2)]
+        self.objections = {}
+        self.provenance = {}
+        self.uploads = 0
+        self.calls = {}
+
+    def count(self, function):
+        with self.lock:
+            self.calls[function] = self.calls.get(function, 0) + 1
+
+    def phi_ql(self, payload):
+        query_type = payload.get('query_type')
+        entity_id = payload.get('entity_id')
+        entity = self.theses.get(entity_id)
+        if entity is None:
+            raise KeyError(f"Entity not found: {payload.get('entity_type')}/{entity_id}")
+        with self.lock:
+            objections = list(self.objections.get(entity_id, []))
+            provenance = list(self.provenance.get(entity_id, []))
+        if query_type == 'WHY':
+            return {'entity': entity, 'support_set': [], 'provenance_tree': provenance,
+                    'explanation': f"{entity['statement']} rests on {len(objections)} "
+                                   f"survived objections"}
+        if query_type == 'TRACE':
+            return {'entity': entity, 'provenance': provenance, 'runs': []}
+        if query_type in ('COUNTEREX', 'REPAIR'):
+            new = {'id': str(uuid.uuid4()), 'target_id': entity_id, 'attack_type': 'counterexample'}
+            with self.lock:
+                self.objections.setdefault(entity_id, []).append(new)
+            return {'entity': entity, 'existing_objections': objections,
+                    'new_counterexamples': [new], 'total_count': len(objections) + 1}
+        raise ValueError(f'Unknown query type: {query_type}')
+
+    def adversarial_loop(self, payload):
+        thesis_id = payload.get('thesis_id')
+        if thesis_id not in self.theses:
+            raise KeyError('Thesis not found')
+        run_id = str(uuid.uuid4())
+        with self.lock:
+            self.provenance.setdefault(thesis_id, []).append(
+                {'entity_id': run_id, 'was_generated_by': thesis_id})
+        return {'run_id': run_id, 'iterations': payload.get('max_iterations', 3)}
+
+    def process_input(self, payload):
+        concept = payload.get('concept') or ''
+        if not concept:
+            raise ValueError('Concept is required')
+        rpe = {'id': str(uuid.uuid4()), 'entity_id': f'RPE-{len(self.rpes):04d}',
+               'name': concept[:100], 'transcendence_score': 5.0}
+        with self.lock:
+            self.rpes.append(rpe)
+        return {'rpe': rpe}
+
+    def upload(self, payload):
+        file = payload.get('file')
+        if not isinstance(file, dict):
+            raise ValueError('No file provided')
+        filename = payload.get('original_filename') or file['filename'] or 'unknown'
+        extension = filename.rsplit('.', 1)[-1].lower()
+        if extension not in UPLOAD_TYPES:
+            raise ValueError(f'Unsupported file type: {extension}. '
+                             f'Supported formats: PDF, TXT, MD, DOCX')
+        with self.lock:
+            self.uploads += 1
+        return {'file_id': str(uuid.uuid4()), 'filename': filename, 'file_type': extension,
+                'file_size': len(file['content']), 'upload_status': 'uploaded'}
+
+    def list_theses(self, payload):
+        with self.lock:
+            theses = [dict(t, objection_count=0, gate_success_rate=0.0)
+                      for t in self.theses.values()]
+        statistics = {status: sum(1 for t in theses if t['status'] == status)
+                      for status in ('validated', 'rejected', 'unverified')}
+        statistics['total'] = len(theses)
+        statistics['average_gate_success'] = 0.0
+        return {'success': True, 'theses': theses, 'statistics': statistics}
+
+    def knowledge_graph(self, payload):
+        with self.lock:
+            nodes = [{'id': r['id'], 'label': r['name']} for r in self.rpes]
+            edges = list(self.edges)
+        return {'nodes': nodes, 'edges': edges}
+
+
+UPLOAD_TYPES = {'pdf', 'txt', 'md', 'docx'}
+
+
+def parse_form(content_type, raw):
+    """multipart/form-data -> {name: str | {'filename', 'content'}}"""
+    message = email.parser.BytesParser(policy=email.policy.HTTP).parsebytes(
+        b'Content-Type: ' + content_type.encode('latin-1') + b'\r\n\r\n' + raw)
+    fields = {}
+    for part in message.iter_parts():
+        name = part.get_param('name', header='content-disposition')
+        content = part.get_payload(decode=True) or b''
+        filename = part.get_filename()
+        fields[name] = ({'filename': filename, 'content': content} if filename is not None
+                        else content.decode('utf-8', 'replace'))
+    return fields
+
+
+HANDLERS = {
+    'phi-ql-query': lambda s, p: {'success': True, 'query_type': p.get('query_type'),
+                                  'result': s.phi_ql(p)},
+    'adversarial-loop': lambda s, p: {'data': s.adversarial_loop(p)},
+    'process-philosophical-input': lambda s, p: {'data': s.process_input(p)},
+    'upload-file': lambda s, p: {'success': True, 'data': s.upload(p)},
+    'get-knowledge-graph-full': lambda s, p: {'data': s.knowledge_graph(p)},
+    'get-knowledge-graph': lambda s, p: {'data': s.knowledge_graph(p)},
+    'list-pis-theses': lambda s, p: s.list_theses(p),
+    'get-rpe': lambda s, p: {'data': s.rpes},
+}
+
+
+def make_handler(state, latency_ms=0.0, jitter_ms=0.0):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+        # Headers and body are separate small writes; with Nagle on, the body
+        # waits for the client's delayed ACK (~40 ms on Linux)
+        disable_nagle_algorithm = True
+
+        def log_message(self, fmt, *args):
+            pass
+
+        def _send(self, status, payload):
+            body = json.dumps(payload).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _dispatch(self):
+            path = self.path.partition('?')[0]
+            length = int(self.headers.get('Content-Length') or 0)
+            raw = self.rfile.read(length) if length else b''
+            if path == '/_standin/stats':
+                return self._send(200, {'calls': state.calls, 'uploads': state.uploads,
+                                        'rpes': len(state.rpes),
+                                        'theses': list(state.theses)})
+
+            function = path.rsplit('/', 1)[-1]
+            handler = HANDLERS.get(function) if path.startswith('/functions/v1/') else None
+            if handler is None:
+                return self._send(404, {'error': {'code': 'NOT_FOUND', 'message': path}})
+
+            state.count(function)
+            if latency_ms or jitter_ms:
+                time.sleep(max(0.0, latency_ms + random.uniform(-jitter_ms, jitter_ms)) / 1000)
+            try:
+                content_type = self.headers.get('Content-Type') or ''
+                if content_type.startswith('multipart/form-data'):
+                    payload = parse_form(content_type, raw)
+                else:
+                    payload = json.loads(raw) if raw else {}
+                self._send(200, handler(state, payload))
+            except (KeyError, ValueError) as e:
+                self._send(500, {'error': {'code': 'FUNCTION_ERROR', 'message': str(e)}})
+
+        do_GET = do_POST = _dispatch
+
+    return Handler
+
+
+def serve(host='127.0.0.1', port=54321, latency_ms=0.0, jitter_ms=0.0, state=None):
+    """Start the stand-in on a background thread; returns (server, state)"""
+    state = state or StandinState()
+    server = ThreadingHTTPServer((host, port), make_handler(state, latency_ms, jitter_ms))
+    threading.Thread(target=server.serve_forever, name='standin', daemon=True).start()
+    return server, state
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Local stand-in for the edge functions')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=54321)
+    parser.add_argument('--latency-ms', type=float, default=0.0)
+    parser.add_argument('--jitter-ms', type=float, default=0.0)
+    args = parser.parse_args(argv)
+
+    server, state = serve(args.host, args.port, args.latency_ms, args.jitter_ms)
+    print(f"Stand-in edge functions on http://{args.host}:{args.port}/functions/v1/")
+    print(f"Sample thesis ids: {', '.join(list(state.theses)[:3])}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
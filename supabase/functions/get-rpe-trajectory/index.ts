@@ -22,6 +22,26 @@ Deno.serve(async (req) => {
     const supabaseUrl = Deno.env.get('SUPABASE_URL')!;
     const supabaseKey = Deno.env.get('SUPABASE_SERVICE_ROLE_KEY')!;
 
+    // Serve the precomputed document when trajectory_cache.py has materialized it
+    const cacheResponse = await fetch(
+      `${supabaseUrl}/rest/v1/rpe_trajectory_cache?rpe_id=eq.${rpe_id}&select=document`,
+      {
+        headers: {
+          'apikey': supabaseKey,
+          'Authorization': `Bearer ${supabaseKey}`,
+        },
+      }
+    );
+    if (cacheResponse.ok) {
+      const cached = await cacheResponse.json();
+      if (cached.length > 0) {
+        return new Response(
+          JSON.stringify({ data: cached[0].document }),
+          { headers: { ...corsHeaders, 'Content-Type': 'application/json' } }
+        );
+      }
+    }
+
     // Fetch RPE data
     const rpeResponse = await fetch(
       `${supabaseUrl}/rest/v1/rpes?id=eq.${rpe_id}&select=*`,
@@ -71,20 +71,15 @@ async function handleWhyQuery(entityType: string, entityId: string, supabaseUrl:
         throw new Error(`Entity not found: ${entityType}/${entityId}`);
     }
 
-    // Get provenance trail
-    const provResponse = await fetch(`${supabaseUrl}/rest/v1/pis_provenance?entity_id=eq.${entityId}`, {
-        headers: {
-            'apikey': supabaseKey,
-            'Authorization': `Bearer ${supabaseKey}`
-        }
-    });
-    const provenance = await provResponse.json();
+    // Get provenance trail (with its full ancestry when the closure is available)
+    const closure = await fetchProvenanceClosure(entityId, supabaseUrl, supabaseKey);
+    const provenance = closure ? closure.self : await fetchProvenance(entityId, supabaseUrl, supabaseKey);
 
     // Build support set based on entity type
     const supportSet = await buildSupportSet(entityType, entity, supabaseUrl, supabaseKey);
 
     // Build provenance tree
-    const provenanceTree = await buildProvenanceTree(provenance, supabaseUrl, supabaseKey);
+    const provenanceTree = await buildProvenanceTree(provenance, closure, supabaseUrl, supabaseKey);
 
     return {
         entity,
@@ -229,13 +224,8 @@ async function handleTraceQuery(entityType: string, entityId: string, supabaseUr
     }
 
     // Get complete provenance chain
-    const provResponse = await fetch(`${supabaseUrl}/rest/v1/pis_provenance?entity_id=eq.${entityId}`, {
-        headers: {
-            'apikey': supabaseKey,
-            'Authorization': `Bearer ${supabaseKey}`
-        }
-    });
-    const provenance = await provResponse.json();
+    const closure = await fetchProvenanceClosure(entityId, supabaseUrl, supabaseKey);
+    const provenance = closure ? closure.self : await fetchProvenance(entityId, supabaseUrl, supabaseKey);
 
     // Get all related entities
     const relatedEntities = await gatherRelatedEntities(entity, entityType, supabaseUrl, supabaseKey);
@@ -255,6 +245,8 @@ async function handleTraceQuery(entityType: string, entityId: string, supabaseUr
     return {
         entity,
         provenance_chain: provenance,
+        provenance_ancestors: closure ? closure.ancestors : [],
+        provenance_descendants: closure ? closure.descendants : [],
         related_entities: relatedEntities,
         validation_timeline: timeline,
         experiment_runs: runs,
@@ -320,8 +312,51 @@ async function buildSupportSet(entityType: string, entity: any, supabaseUrl: str
     return supportSet;
 }
 
+// Helper: Provenance rows recorded for one entity
+async function fetchProvenance(entityId: string, supabaseUrl: string, supabaseKey: string) {
+    const response = await fetch(`${supabaseUrl}/rest/v1/pis_provenance?entity_id=eq.${entityId}`, {
+        headers: {
+            'apikey': supabaseKey,
+            'Authorization': `Bearer ${supabaseKey}`
+        }
+    });
+    return await response.json();
+}
+
+// Helper: Entity, ancestor and descendant provenance in one indexed read from the
+// closure maintained by provenance_closure.py; null if trace_provenance is not deployed
+async function fetchProvenanceClosure(entityId: string, supabaseUrl: string, supabaseKey: string) {
+    const response = await fetch(`${supabaseUrl}/rest/v1/rpc/trace_provenance`, {
+        method: 'POST',
+        headers: {
+            'apikey': supabaseKey,
+            'Authorization': `Bearer ${supabaseKey}`,
+            'Content-Type': 'application/json'
+        },
+        body: JSON.stringify({ p_entity_id: entityId })
+    });
+    if (!response.ok) {
+        return null;
+    }
+    const rows = await response.json();
+
+    const closure: any = { self: [], ancestors: [], descendants: [], byEntity: new Map() };
+    for (const row of rows) {
+        if (row.direction === 'self') {
+            closure.self.push(row.provenance);
+            continue;
+        }
+        const entry = { entity_id: row.entity_id, depth: row.depth, provenance: row.provenance };
+        (row.direction === 'ancestor' ? closure.ancestors : closure.descendants).push(entry);
+        if (row.provenance && !closure.byEntity.has(row.entity_id)) {
+            closure.byEntity.set(row.entity_id, row.provenance);
+        }
+    }
+    return closure;
+}
+
 // Helper: Build provenance tree
-async function buildProvenanceTree(provenance: any[], supabaseUrl: string, supabaseKey: string) {
+async function buildProvenanceTree(provenance: any[], closure: any, supabaseUrl: string, supabaseKey: string) {
     const tree: any = {
         roots: [],
         nodes: []
@@ -342,6 +377,12 @@ async function buildProvenanceTree(provenance: any[], supabaseUrl: string, supab
         // Get derived entities
         if (prov.was_derived_from && prov.was_derived_from.length > 0) {
             for (const sourceId of prov.was_derived_from) {
+                // Already loaded with the closure; fetch only if it has not caught up yet
+                const known = closure?.byEntity.get(sourceId);
+                if (known) {
+                    node.children.push(known);
+                    continue;
+                }
                 const childProvResponse = await fetch(`${supabaseUrl}/rest/v1/pis_provenance?entity_id=eq.${sourceId}`, {
                     headers: {
                         'apikey': supabaseKey,
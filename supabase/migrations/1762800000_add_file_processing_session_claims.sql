@@ -0,0 +1,39 @@
+-- Migration: add_file_processing_session_claims
+-- Created at: 1762800000
+
+-- Lease columns so worker daemons can claim queued sessions safely
+ALTER TABLE file_processing_sessions
+ADD COLUMN IF NOT EXISTS claimed_by TEXT,
+ADD COLUMN IF NOT EXISTS lease_expires_at TIMESTAMP WITH TIME ZONE,
+ADD COLUMN IF NOT EXISTS attempts INTEGER DEFAULT 0;
+
+CREATE INDEX IF NOT EXISTS idx_processing_sessions_queue
+    ON file_processing_sessions(processing_status, created_at);
+
+-- Claim up to batch_size sessions: queued ones first, plus 'processing' ones
+-- whose lease expired (their worker died). SKIP LOCKED lets any number of
+-- daemons call this concurrently without handing out the same row twice.
+CREATE OR REPLACE FUNCTION claim_file_processing_sessions(
+    worker_id TEXT,
+    batch_size INTEGER DEFAULT 10,
+    lease_seconds INTEGER DEFAULT 300
+)
+RETURNS SETOF file_processing_sessions
+LANGUAGE sql
+AS $$
+    UPDATE file_processing_sessions s
+    SET processing_status = 'processing',
+        claimed_by = worker_id,
+        lease_expires_at = NOW() + make_interval(secs => lease_seconds),
+        attempts = COALESCE(s.attempts, 0) + 1,
+        started_at = NOW()
+    WHERE s.id IN (
+        SELECT id FROM file_processing_sessions
+        WHERE processing_status = 'queued'
+           OR (processing_status = 'processing' AND lease_expires_at < NOW())
+        ORDER BY created_at
+        LIMIT batch_size
+        FOR UPDATE SKIP LOCKED
+    )
+    RETURNING s.*;
+$$;
@@ -0,0 +1,14 @@
+-- Migration: create_rpe_trajectory_cache
+-- Created at: 1762800100
+
+-- Materialized per-RPE trajectory documents, maintained by trajectory_cache.py
+CREATE TABLE IF NOT EXISTS rpe_trajectory_cache (
+    rpe_id UUID PRIMARY KEY,
+    document JSONB NOT NULL,
+    refreshed_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+ALTER TABLE rpe_trajectory_cache ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Allow all operations for anon and service_role" ON rpe_trajectory_cache
+    FOR ALL USING (auth.role() IN ('anon', 'service_role'));
@@ -0,0 +1,18 @@
+-- Migration: create_integrity_quarantine
+-- Created at: 1762800200
+
+-- Rows removed by integrity_check.py --quarantine, kept for review or restore
+CREATE TABLE IF NOT EXISTS integrity_quarantine (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    source_table TEXT NOT NULL,
+    row_id UUID NOT NULL,
+    reason TEXT NOT NULL,
+    row_data JSONB NOT NULL,
+    quarantined_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    UNIQUE (source_table, row_id)
+);
+
+ALTER TABLE integrity_quarantine ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Allow all operations for anon and service_role" ON integrity_quarantine
+    FOR ALL USING (auth.role() IN ('anon', 'service_role'));
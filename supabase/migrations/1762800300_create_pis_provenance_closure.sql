@@ -0,0 +1,45 @@
+-- Migration: create_pis_provenance_closure
+-- Created at: 1762800300
+
+-- Transitive closure of pis_provenance.was_derived_from, maintained by
+-- provenance_closure.py. One row per (ancestor, descendant) pair with the
+-- length of the shortest derivation path between them.
+CREATE TABLE IF NOT EXISTS pis_provenance_closure (
+    ancestor_id UUID NOT NULL,
+    descendant_id UUID NOT NULL,
+    depth INTEGER NOT NULL CHECK (depth > 0),
+    PRIMARY KEY (ancestor_id, descendant_id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_pis_provenance_closure_descendant
+    ON pis_provenance_closure (descendant_id, depth);
+CREATE INDEX IF NOT EXISTS idx_pis_provenance_entity_id
+    ON pis_provenance (entity_id);
+
+ALTER TABLE pis_provenance_closure ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Allow all operations for anon and service_role" ON pis_provenance_closure
+    FOR ALL USING (auth.role() IN ('anon', 'service_role'));
+
+-- Provenance rows for an entity, all its ancestors and all its descendants
+-- in a single indexed read (used by phi-ql-query TRACE/WHY)
+CREATE OR REPLACE FUNCTION trace_provenance(p_entity_id UUID)
+RETURNS TABLE (direction TEXT, entity_id UUID, depth INTEGER, provenance JSONB)
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT 'self', p.entity_id, 0, to_jsonb(p)
+    FROM pis_provenance p
+    WHERE p.entity_id = p_entity_id
+    UNION ALL
+    SELECT 'ancestor', c.ancestor_id, c.depth, to_jsonb(p)
+    FROM pis_provenance_closure c
+    LEFT JOIN pis_provenance p ON p.entity_id = c.ancestor_id
+    WHERE c.descendant_id = p_entity_id
+    UNION ALL
+    SELECT 'descendant', c.descendant_id, c.depth, to_jsonb(p)
+    FROM pis_provenance_closure c
+    LEFT JOIN pis_provenance p ON p.entity_id = c.descendant_id
+    WHERE c.ancestor_id = p_entity_id
+    ORDER BY 1, 3;
+$$;
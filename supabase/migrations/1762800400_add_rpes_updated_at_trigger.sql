@@ -0,0 +1,52 @@
+-- Migration: add_rpes_updated_at_trigger
+-- Created at: 1762800400
+
+-- Keep rpes.updated_at current so incremental exports (export_snapshot.py,
+-- trajectory_cache.py) see PATCHes such as pis_validation updates
+CREATE OR REPLACE FUNCTION set_updated_at()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    NEW.updated_at = NOW();
+    RETURN NEW;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS trg_rpes_updated_at ON rpes;
+CREATE TRIGGER trg_rpes_updated_at
+    BEFORE UPDATE ON rpes
+    FOR EACH ROW EXECUTE FUNCTION set_updated_at();
+
+DROP TRIGGER IF EXISTS trg_pis_controlled_vocabulary_updated_at ON pis_controlled_vocabulary;
+CREATE TRIGGER trg_pis_controlled_vocabulary_updated_at
+    BEFORE UPDATE ON pis_controlled_vocabulary
+    FOR EACH ROW EXECUTE FUNCTION set_updated_at();
+
+-- Keyset pages are ordered by (watermark, id); without a matching index
+-- every page sorts the whole table
+CREATE INDEX IF NOT EXISTS idx_rpes_updated_at_id ON rpes(updated_at, id);
+CREATE INDEX IF NOT EXISTS idx_rpes_created_at_id ON rpes(created_at, id);
+CREATE INDEX IF NOT EXISTS idx_axioms_created_at_id ON axioms(created_at, id);
+CREATE INDEX IF NOT EXISTS idx_knowledge_graph_created_at_id ON knowledge_graph(created_at, id);
+CREATE INDEX IF NOT EXISTS idx_training_corpus_created_at_id ON training_corpus(created_at, id);
+CREATE INDEX IF NOT EXISTS idx_iterative_densification_layers_created_at_id
+    ON iterative_densification_layers(created_at, id);
+CREATE INDEX IF NOT EXISTS idx_transcendence_trajectories_created_at_id
+    ON transcendence_trajectories(created_at, id);
+CREATE INDEX IF NOT EXISTS idx_une_definitions_created_at_id ON une_definitions(created_at, id);
+CREATE INDEX IF NOT EXISTS idx_file_rpe_relationships_created_at_id
+    ON file_rpe_relationships(created_at, id);
+CREATE INDEX IF NOT EXISTS idx_pis_arguments_created_at_id ON pis_arguments(created_at, id);
+CREATE INDEX IF NOT EXISTS idx_pis_claims_created_at_id ON pis_claims(created_at, id);
+CREATE INDEX IF NOT EXISTS idx_pis_concepts_created_at_id ON pis_concepts(created_at, id);
+CREATE INDEX IF NOT EXISTS idx_pis_controlled_vocabulary_updated_at_id
+    ON pis_controlled_vocabulary(updated_at, id);
+CREATE INDEX IF NOT EXISTS idx_pis_hypotheses_created_at_id ON pis_hypotheses(created_at, id);
+CREATE INDEX IF NOT EXISTS idx_pis_norms_created_at_id ON pis_norms(created_at, id);
+CREATE INDEX IF NOT EXISTS idx_pis_objections_created_at_id ON pis_objections(created_at, id);
+CREATE INDEX IF NOT EXISTS idx_pis_provenance_generated_at_id ON pis_provenance(generated_at, id);
+CREATE INDEX IF NOT EXISTS idx_pis_runs_started_at_id ON pis_runs(started_at, id);
+CREATE INDEX IF NOT EXISTS idx_pis_scenarios_created_at_id ON pis_scenarios(created_at, id);
+CREATE INDEX IF NOT EXISTS idx_pis_textunits_created_at_id ON pis_textunits(created_at, id);
+CREATE INDEX IF NOT EXISTS idx_pis_theses_created_at_id ON pis_theses(created_at, id);
@@ -0,0 +1,74 @@
+-- Migration: invalidate_rpe_trajectory_cache
+-- Created at: 1762800500
+
+-- Axioms had no updated_at, so trajectory_cache.py could not see edits
+-- through its watermark. Existing rows take their creation time.
+ALTER TABLE axioms ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW();
+UPDATE axioms SET updated_at = created_at WHERE created_at IS NOT NULL;
+
+DROP TRIGGER IF EXISTS trg_axioms_updated_at ON axioms;
+CREATE TRIGGER trg_axioms_updated_at
+    BEFORE UPDATE ON axioms
+    FOR EACH ROW EXECUTE FUNCTION set_updated_at();
+
+CREATE INDEX IF NOT EXISTS idx_axioms_updated_at_id ON axioms(updated_at, id);
+
+-- Drop a cached trajectory document as soon as anything it was built from
+-- changes or disappears. get-rpe-trajectory then computes the payload live
+-- until trajectory_cache.py rebuilds the row on its next run.
+CREATE OR REPLACE FUNCTION invalidate_rpe_trajectory_cache()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    IF TG_TABLE_NAME = 'rpes' THEN
+        DELETE FROM rpe_trajectory_cache WHERE rpe_id = OLD.id;
+    ELSIF TG_TABLE_NAME = 'axioms' THEN
+        DELETE FROM rpe_trajectory_cache
+        WHERE rpe_id = OLD.rpe_id
+           OR rpe_id IN (SELECT rpe_id FROM transcendence_trajectories WHERE axiom_id = OLD.id);
+        -- An axiom moved to another RPE also changes that RPE's document
+        IF TG_OP = 'UPDATE' AND NEW.rpe_id IS DISTINCT FROM OLD.rpe_id THEN
+            DELETE FROM rpe_trajectory_cache WHERE rpe_id = NEW.rpe_id;
+        END IF;
+    ELSE
+        IF TG_OP <> 'INSERT' THEN
+            DELETE FROM rpe_trajectory_cache WHERE rpe_id = OLD.rpe_id;
+        END IF;
+        IF TG_OP <> 'DELETE' THEN
+            DELETE FROM rpe_trajectory_cache WHERE rpe_id = NEW.rpe_id;
+        END IF;
+    END IF;
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS trg_rpes_trajectory_cache ON rpes;
+CREATE TRIGGER trg_rpes_trajectory_cache
+    AFTER UPDATE OR DELETE ON rpes
+    FOR EACH ROW EXECUTE FUNCTION invalidate_rpe_trajectory_cache();
+
+DROP TRIGGER IF EXISTS trg_axioms_trajectory_cache ON axioms;
+CREATE TRIGGER trg_axioms_trajectory_cache
+    AFTER UPDATE OR DELETE ON axioms
+    FOR EACH ROW EXECUTE FUNCTION invalidate_rpe_trajectory_cache();
+
+DROP TRIGGER IF EXISTS trg_transcendence_trajectories_trajectory_cache
+    ON transcendence_trajectories;
+CREATE TRIGGER trg_transcendence_trajectories_trajectory_cache
+    AFTER INSERT OR UPDATE OR DELETE ON transcendence_trajectories
+    FOR EACH ROW EXECUTE FUNCTION invalidate_rpe_trajectory_cache();
+
+DROP TRIGGER IF EXISTS trg_iterative_densification_layers_trajectory_cache
+    ON iterative_densification_layers;
+CREATE TRIGGER trg_iterative_densification_layers_trajectory_cache
+    AFTER INSERT OR UPDATE OR DELETE ON iterative_densification_layers
+    FOR EACH ROW EXECUTE FUNCTION invalidate_rpe_trajectory_cache();
+
+-- get-trajectory and the cache rebuild both look trajectories up by RPE
+CREATE INDEX IF NOT EXISTS idx_transcendence_trajectories_rpe_id
+    ON transcendence_trajectories(rpe_id);
+CREATE INDEX IF NOT EXISTS idx_transcendence_trajectories_axiom_id
+    ON transcendence_trajectories(axiom_id);
+CREATE INDEX IF NOT EXISTS idx_iterative_densification_layers_rpe_id
+    ON iterative_densification_layers(rpe_id);
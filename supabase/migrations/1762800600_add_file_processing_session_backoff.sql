@@ -0,0 +1,33 @@
+-- Migration: add_file_processing_session_backoff
+-- Created at: 1762800600
+
+-- Failed sessions are re-queued with an exponential backoff; workers skip
+-- them until available_at has passed
+ALTER TABLE file_processing_sessions
+ADD COLUMN IF NOT EXISTS available_at TIMESTAMP WITH TIME ZONE;
+
+CREATE OR REPLACE FUNCTION claim_file_processing_sessions(
+    worker_id TEXT,
+    batch_size INTEGER DEFAULT 10,
+    lease_seconds INTEGER DEFAULT 300
+)
+RETURNS SETOF file_processing_sessions
+LANGUAGE sql
+AS $$
+    UPDATE file_processing_sessions s
+    SET processing_status = 'processing',
+        claimed_by = worker_id,
+        lease_expires_at = NOW() + make_interval(secs => lease_seconds),
+        attempts = COALESCE(s.attempts, 0) + 1,
+        started_at = NOW()
+    WHERE s.id IN (
+        SELECT id FROM file_processing_sessions
+        WHERE (processing_status = 'queued'
+               AND (available_at IS NULL OR available_at <= NOW()))
+           OR (processing_status = 'processing' AND lease_expires_at < NOW())
+        ORDER BY created_at
+        LIMIT batch_size
+        FOR UPDATE SKIP LOCKED
+    )
+    RETURNING s.*;
+$$;
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""Minimal PostgREST client shared by the Python tooling"""
+
+import json
+import os
+import sys
+import urllib.error
+import urllib.parse
+import urllib.request
+
+from metrics import METRICS
+
+DEFAULT_SUPABASE_URL = 'https://jmaxcgoooguzmcnnanfb.supabase.co'
+DEFAULT_PAGE_SIZE = 1000
+
+
+class SupabaseError(Exception):
+    """Raised when the REST API answers with a non-2xx status"""
+
+    def __init__(self, status, body, method='', url=''):
+        super().__init__(f"{method} {url} -> {status}: {body[:300]}")
+        self.status = status
+        self.body = body
+
+
+def load_config():
+    """Read SUPABASE_URL / SUPABASE_SERVICE_ROLE_KEY from the environment"""
+    url = os.environ.get('SUPABASE_URL', DEFAULT_SUPABASE_URL).rstrip('/')
+    key = os.environ.get('SUPABASE_SERVICE_ROLE_KEY', '')
+    if not key:
+        print("ERROR: SUPABASE_SERVICE_ROLE_KEY not found in environment", file=sys.stderr)
+        sys.exit(1)
+    return url, key
+
+
+def _quote(value):
+    """Quote a value for use inside a PostgREST or=(...) expression"""
+    return '"' + str(value).replace('\\', '\\\\').replace('"', '\\"') + '"'
+
+
+class SupabaseRest:
+    """Thin wrapper over the /rest/v1 endpoints using urllib only"""
+
+    def __init__(self, url=None, key=None, timeout=60):
+        if url is None or key is None:
+            env_url, env_key = load_config()
+            url = url or env_url
+            key = key or env_key
+        self.url = url.rstrip('/')
+        self.key = key
+        self.timeout = timeout
+
+    def request(self, method, path, params=None, body=None, prefer=None, headers=None):
+        """Send one request and return the decoded JSON payload (or None)"""
+        url = f"{self.url}/{path.lstrip('/')}"
+        if params:
+            url += '?' + urllib.parse.urlencode(params, safe='*,()."')
+        req_headers = {
+            'Authorization': f'Bearer {self.key}',
+            'apikey': self.key,
+            'Content-Type': 'application/json',
+        }
+        if prefer:
+            req_headers['Prefer'] = prefer
+        if headers:
+            req_headers.update(headers)
+
+        data = None
+        if body is not None:
+            with METRICS.span('serialize'):
+                data = body if isinstance(body, bytes) else json.dumps(body).encode('utf-8')
+        req = urllib.request.Request(url, data=data, headers=req_headers, method=method)
+
+        if data:
+            METRICS.incr('bytes_sent', len(data))
+        try:
+            with METRICS.span('http_send'):
+                with urllib.request.urlopen(req, timeout=self.timeout) as response:
+                    raw = response.read()
+        except urllib.error.HTTPError as e:
+            METRICS.incr('http_errors')
+            raise SupabaseError(e.code, e.read().decode('utf-8', 'replace'), method, url) from None
+        METRICS.incr('bytes_received', len(raw))
+
+        if not raw:
+            return None
+        with METRICS.span('json_decode'):
+            return json.loads(raw)
+
+    def select(self, table, params=None):
+        """GET /rest/v1/<table> with raw PostgREST query params"""
+        return self.request('GET', f'rest/v1/{table}', params=params) or []
+
+    def iter_pages(self, table, columns='*', watermark_column='created_at', since=None,
+                   page_size=DEFAULT_PAGE_SIZE, filters=None):
+        """Yield pages of rows ordered by (watermark_column, id).
+
+        Uses keyset pagination so pages stay cheap deep into large tables.
+        `since` is a (watermark_value, id) pair; only rows strictly after it
+        are returned.
+        """
+        cursor = since
+        while True:
+            params = dict(filters or {})
+            params['select'] = columns
+            params['order'] = f'{watermark_column}.asc,id.asc'
+            params['limit'] = str(page_size)
+            if cursor is not None:
+                mark, last_id = cursor
+                params['or'] = (
+                    f'({watermark_column}.gt.{_quote(mark)},'
+                    f'and({watermark_column}.eq.{_quote(mark)},id.gt.{last_id}))'
+                )
+
+            rows = self.select(table, params)
+            if not rows:
+                return
+            yield rows
+            if len(rows) < page_size:
+                return
+            last = rows[-1]
+            cursor = (last[watermark_column], last['id'])
+
+    def insert(self, table, rows, upsert=False, on_conflict=None, returning=False):
+        """POST rows; optionally merge duplicates on `on_conflict`"""
+        prefer = ['return=representation' if returning else 'return=minimal']
+        if upsert:
+            prefer.append('resolution=merge-duplicates')
+        params = {'on_conflict': on_conflict} if on_conflict else None
+        return self.request('POST', f'rest/v1/{table}', params=params, body=rows,
+                            prefer=','.join(prefer))
+
+    def update(self, table, filters, patch, returning=False):
+        """PATCH rows matching `filters` (PostgREST operator syntax)"""
+        prefer = 'return=representation' if returning else 'return=minimal'
+        return self.request('PATCH', f'rest/v1/{table}', params=filters, body=patch,
+                            prefer=prefer)
+
+    def delete(self, table, filters):
+        """DELETE rows matching `filters`"""
+        return self.request('DELETE', f'rest/v1/{table}', params=filters,
+                            prefer='return=minimal')
+
+    def rpc(self, name, args=None):
+        """Call a Postgres function exposed under /rest/v1/rpc"""
+        return self.request('POST', f'rest/v1/rpc/{name}', body=args or {})
@@ -0,0 +1,28 @@
+import json
+
+import load_corpus_batch
+from metrics import METRICS
+
+
+def test_parse_records_json_decode_and_idp_parse_spans(tmp_path, monkeypatch):
+    path = tmp_path / 'trainset.jsonl'
+    example = {'messages': [
+        {'role': 'user', 'content': 'Is there meaning in the absurd?'},
+        {'role': 'assistant', 'content': 'IDP/1 excavate IDP/2 fracture '
+                                         'Receive the remainder: silence ⸸'},
+    ]}
+    path.write_text(json.dumps(example) + '\n' + 'not json\n', encoding='utf-8')
+    monkeypatch.setattr(METRICS, 'enabled', True)
+    METRICS.reset()
+    try:
+        records = load_corpus_batch.parse_trainset(str(path))
+        snapshot = METRICS.to_dict()
+    finally:
+        METRICS.reset()
+
+    assert len(records) == 1
+    assert records[0]['philosophical_domain'] == 'existentialism'
+    assert records[0]['sacred_remainder'] == 'silence'
+    assert snapshot['histograms']['json_decode']['count'] == 2
+    assert snapshot['histograms']['idp_parse']['count'] == 1
+    assert snapshot['counters']['rows_failed'] == 1
@@ -0,0 +1,70 @@
+import asyncio
+import json
+import random
+
+import pytest
+
+import load_test
+from standin_backend import serve
+
+
+class FakePool:
+    """Answers every request with one canned (status, body)"""
+
+    def __init__(self, status=200, payload=None):
+        self.status = status
+        self.body = json.dumps(payload if payload is not None else {}).encode()
+        self.paths = []
+
+    async def request(self, method, path, body=b'', content_type='application/json'):
+        self.paths.append(path)
+        return self.status, self.body
+
+
+def test_thesis_ids_come_from_the_theses_field():
+    pool = FakePool(payload={'success': True, 'theses': [{'id': 't1'}, {'id': 't2'}, {}],
+                             'statistics': {'total': 3}})
+    assert asyncio.run(load_test.fetch_thesis_ids(pool)) == ['t1', 't2']
+
+
+def test_thesis_ids_fall_back_to_data():
+    pool = FakePool(payload={'data': [{'id': 't1'}]})
+    assert asyncio.run(load_test.fetch_thesis_ids(pool)) == ['t1']
+
+
+def test_thesis_listing_failure_is_raised():
+    pool = FakePool(status=500, payload={'error': 'boom'})
+    with pytest.raises(load_test.HttpError, match='500'):
+        asyncio.run(load_test.fetch_thesis_ids(pool))
+
+
+def test_thesis_ids_from_the_standin():
+    server, state = serve(port=0)
+
+    async def fetch():
+        pool = load_test.ConnectionPool(f'http://127.0.0.1:{server.server_address[1]}')
+        try:
+            return await load_test.fetch_thesis_ids(pool)
+        finally:
+            pool.close()
+
+    try:
+        ids = asyncio.run(fetch())
+    finally:
+        server.shutdown()
+    assert sorted(ids) == sorted(state.theses)
+
+
+def test_unbuildable_requests_are_error_samples():
+    pool = FakePool(payload={'success': True})
+    workload = load_test.Workload([('a.md', b'A sentence that is long enough to be a concept.')],
+                                  [], random.Random(1))
+    report = asyncio.run(load_test.run(pool, workload, 'queries', rate=200, duration=0.2,
+                                       max_in_flight=100, seed=1))
+    endpoints = report['endpoints']
+    failed = endpoints[load_test.BUILD_ERROR_ENDPOINT]
+    assert failed['requests'] == failed['errors'] > 0
+    assert 'no theses available' in report['first_errors'][load_test.BUILD_ERROR_ENDPOINT]
+    # get-knowledge-graph-full needs no thesis, so those requests still went out
+    assert endpoints['get-knowledge-graph-full']['errors'] == 0
+    assert report['overall']['requests'] == sum(e['requests'] for e in endpoints.values())
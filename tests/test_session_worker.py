@@ -0,0 +1,83 @@
+from datetime import datetime
+
+import session_worker
+from supabase_rest import SupabaseError
+
+
+class FakeRest:
+    """One claimable session; records PATCHes to file_processing_sessions"""
+
+    def __init__(self, attempts=1, text='First sentence is long enough. Another one here.',
+                 owner='w1', fail_finish=False):
+        self.session = {'id': 's1', 'file_id': 'f1', 'attempts': attempts}
+        self.text = text
+        self.owner = owner
+        self.fail_finish = fail_finish
+        self.claims = 0
+        self.patches = []
+        self.inserted = []
+
+    def rpc(self, name, args):
+        self.claims += 1
+        return [dict(self.session)] if self.claims == 1 else []
+
+    def select(self, table, params):
+        if table == 'file_content':
+            return [{'extracted_text': self.text}] if self.text is not None else []
+        return []
+
+    def insert(self, table, rows, returning=False):
+        self.inserted.append(table)
+        return [dict(r, id=f'id{i}') for i, r in enumerate(rows)] if returning else None
+
+    def update(self, table, filters, patch, returning=False):
+        if filters.get('claimed_by') != f'eq.{self.owner}':
+            return []
+        if 'processing_status' in patch and self.fail_finish:
+            raise SupabaseError(503, 'unavailable', 'PATCH', table)
+        self.patches.append(patch)
+        return [dict(self.session)]
+
+
+def run_once(client):
+    session_worker.SessionWorker(client, worker_id='w1').run(once=True)
+
+
+def test_completed_session_creates_rpes_and_links():
+    client = FakeRest()
+    run_once(client)
+    assert client.inserted == ['rpes', 'file_rpe_relationships']
+    assert client.patches[-1]['processing_status'] == 'completed'
+    assert client.patches[-1]['available_at'] is None
+
+
+def test_failed_session_is_requeued_with_backoff():
+    for attempts in (1, 2):
+        client = FakeRest(attempts=attempts, text=None)
+        before = datetime.now().astimezone()
+        run_once(client)
+        final = client.patches[-1]
+        assert final['processing_status'] == 'queued'
+        delay = (datetime.fromisoformat(final['available_at']) - before).total_seconds()
+        assert abs(delay - session_worker.retry_delay(attempts)) < 5
+    assert session_worker.retry_delay(2) == 2 * session_worker.retry_delay(1)
+    assert session_worker.retry_delay(50) == session_worker.RETRY_MAX_SECONDS
+
+
+def test_last_attempt_fails_without_backoff():
+    client = FakeRest(attempts=session_worker.MAX_ATTEMPTS, text=None)
+    run_once(client)
+    assert client.patches[-1]['processing_status'] == 'failed'
+    assert client.patches[-1]['available_at'] is None
+
+
+def test_failed_status_write_does_not_stop_the_daemon():
+    client = FakeRest(text=None, fail_finish=True)
+    run_once(client)
+    assert client.claims == 2  # kept polling after the failed write
+
+
+def test_lost_lease_abandons_the_session():
+    client = FakeRest(owner='someone-else')
+    run_once(client)
+    assert client.inserted == [] and client.patches == []
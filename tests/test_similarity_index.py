@@ -0,0 +1,79 @@
+import pytest
+
+import similarity_index
+
+
+class FakeRest:
+    """knowledge_graph/rpes/training_corpus in memory; insert can be made to fail"""
+
+    def __init__(self, rpes, edges=(), fail_after=None):
+        self.rpes = rpes
+        self.edges = list(edges)
+        self.fail_after = fail_after
+        self.inserted = 0
+        self.next_id = 1000
+
+    def iter_pages(self, table, columns='*', watermark_column='created_at', since=None,
+                   page_size=1000, filters=None):
+        if table == 'rpes':
+            rows = self.rpes
+        elif table == 'knowledge_graph':
+            kind = (filters or {}).get('relationship_type', '').removeprefix('eq.')
+            rows = [e for e in self.edges if not kind or e['relationship_type'] == kind]
+        else:
+            rows = []
+        if rows:
+            yield [dict(r) for r in rows]
+
+    def insert(self, table, rows):
+        if self.fail_after is not None and self.inserted >= self.fail_after:
+            raise RuntimeError('connection reset')
+        for row in rows:
+            self.next_id += 1
+            self.edges.append(dict(row, id=str(self.next_id)))
+        self.inserted += 1
+
+    def delete(self, table, filters):
+        ids = set(filters['id'].removeprefix('in.(').removesuffix(')').split(','))
+        self.edges = [e for e in self.edges if e['id'] not in ids]
+
+
+def rpes():
+    texts = ['void grounds placeholder', 'void grounds absence', 'kenosis apophatic emptying',
+             'kenosis apophatic silence']
+    return [{'id': f'r{i}', 'name': '', 'core_fracture': t, 'created_at': f't{i}'}
+            for i, t in enumerate(texts)]
+
+
+def old_edge(i):
+    return {'id': f'old{i}', 'source_entity_id': 'r0', 'target_entity_id': 'r1',
+            'relationship_type': similarity_index.RELATIONSHIP_TYPE}
+
+
+def test_build_replaces_edges_after_writing(tmp_path):
+    other = {'id': 'x', 'relationship_type': 'philosophical_resonance'}
+    client = FakeRest(rpes(), [old_edge(1), old_edge(2), other])
+    similarity_index.build(client, tmp_path, k=2, min_similarity=0.1, replace=True)
+
+    ids = {e['id'] for e in client.edges}
+    assert 'x' in ids and not ids & {'old1', 'old2'}
+    assert len(ids) == 3  # two new content_similarity pairs plus the untouched edge
+
+
+def test_failed_build_keeps_previous_edges(tmp_path, monkeypatch):
+    monkeypatch.setattr(similarity_index, 'INSERT_BATCH_SIZE', 1)
+    client = FakeRest(rpes(), [old_edge(1)], fail_after=1)
+    with pytest.raises(RuntimeError):
+        similarity_index.build(client, tmp_path, k=2, min_similarity=0.1, replace=True)
+    assert 'old1' in {e['id'] for e in client.edges}
+
+
+def test_update_indexes_unseen_vocabulary(tmp_path):
+    client = FakeRest(rpes()[:2])
+    similarity_index.build(client, tmp_path, k=2, min_similarity=0.1, replace=True)
+    index = similarity_index.SimilarityIndex.load(tmp_path)
+    rows = index.add(rpes()[2:])
+    assert index.matrix[list(rows)].nnz > 0
+    pairs = {(e['source_entity_id'], e['target_entity_id'])
+             for e in similarity_index.edges_for(index, rows, k=2, min_similarity=0.1)}
+    assert pairs == {('r2', 'r3')}
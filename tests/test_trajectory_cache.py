@@ -0,0 +1,109 @@
+import glob
+import os
+import re
+import shutil
+import subprocess
+import uuid
+
+import pytest
+
+import trajectory_cache
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class FakeRest:
+    """Source tables in memory, paged by (watermark, id) like SupabaseRest.iter_pages"""
+
+    def __init__(self, tables):
+        self.tables = tables
+
+    def iter_pages(self, table, columns='*', watermark_column='created_at', since=None,
+                   page_size=1000, filters=None):
+        rows = sorted(self.tables.get(table, []), key=lambda r: (r[watermark_column], r['id']))
+        if since is not None:
+            rows = [r for r in rows if (r[watermark_column], r['id']) > tuple(since)]
+        if rows:
+            yield [dict(r) for r in rows]
+
+    def select(self, table, params):
+        axiom_ids = params['axiom_id'].removeprefix('in.(').removesuffix(')').split(',')
+        return [r for r in self.tables[table] if r.get('axiom_id') in axiom_ids]
+
+
+def sources():
+    return {
+        'rpes': [{'id': 'r1', 'updated_at': 't1'}, {'id': 'r2', 'updated_at': 't1'}],
+        'transcendence_trajectories': [
+            {'id': 'tt1', 'rpe_id': 'r2', 'axiom_id': 'a1', 'created_at': 't1'}],
+        'iterative_densification_layers': [],
+        'axioms': [{'id': 'a1', 'rpe_id': 'r1', 'created_at': 't1', 'updated_at': 't1'}],
+    }
+
+
+def test_edited_axiom_marks_its_rpes_dirty():
+    tables = sources()
+    client = FakeRest(tables)
+    dirty, state = trajectory_cache.find_dirty(client, {})
+    assert dirty == {'r1', 'r2'}
+
+    dirty, state = trajectory_cache.find_dirty(client, state)
+    assert dirty == set()
+
+    # An edit bumps updated_at but leaves created_at alone
+    tables['axioms'][0]['updated_at'] = 't2'
+    dirty, state = trajectory_cache.find_dirty(client, state)
+    assert dirty == {'r1', 'r2'}
+    assert state['axioms'] == ['t2', 'a1']
+
+
+DATABASE_URL = os.environ.get('TEST_DATABASE_URL')
+
+
+def psql(sql):
+    result = subprocess.run(['psql', DATABASE_URL, '-v', 'ON_ERROR_STOP=1', '-qAt', '-c', sql],
+                            capture_output=True, text=True, check=True)
+    return result.stdout.split()
+
+
+def migration(timestamp):
+    with open(glob.glob(os.path.join(ROOT, 'supabase', 'migrations', f'{timestamp}_*.sql'))[0],
+              'r', encoding='utf-8') as f:
+        return f.read()
+
+
+@pytest.mark.skipif(not DATABASE_URL or not shutil.which('psql'),
+                    reason='needs psql and TEST_DATABASE_URL')
+def test_moving_an_axiom_invalidates_both_rpes():
+    schema = f'trajectory_cache_test_{uuid.uuid4().hex[:8]}'
+    r1, r2, r3, r4, a1 = (f'00000000-0000-0000-0000-00000000000{i}' for i in range(1, 6))
+    set_updated_at = re.search(r'CREATE OR REPLACE FUNCTION set_updated_at\(\).*?\$\$;',
+                               migration(1762800400), re.S).group(0)
+    setup = f"""
+        CREATE SCHEMA {schema};
+        SET search_path TO {schema};
+        CREATE TABLE rpes (id UUID PRIMARY KEY);
+        CREATE TABLE axioms (id UUID PRIMARY KEY, rpe_id UUID,
+                             created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW());
+        CREATE TABLE transcendence_trajectories (id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+                                                 rpe_id UUID, axiom_id UUID);
+        CREATE TABLE iterative_densification_layers (id UUID PRIMARY KEY, rpe_id UUID);
+        CREATE TABLE rpe_trajectory_cache (rpe_id UUID PRIMARY KEY, document JSONB NOT NULL);
+        {set_updated_at}
+        {migration(1762800500)}
+        INSERT INTO rpes VALUES ('{r1}'), ('{r2}'), ('{r3}'), ('{r4}');
+        INSERT INTO axioms (id, rpe_id, created_at) VALUES ('{a1}', '{r1}', '2020-01-01');
+        INSERT INTO transcendence_trajectories (rpe_id, axiom_id) VALUES ('{r2}', '{a1}');
+        INSERT INTO rpe_trajectory_cache
+            SELECT id, '{{}}'::jsonb FROM rpes;
+    """
+    psql(setup)
+    try:
+        psql(f"SET search_path TO {schema}; "
+             f"UPDATE axioms SET rpe_id = '{r3}' WHERE id = '{a1}'")
+        cached = psql(f"SELECT rpe_id FROM {schema}.rpe_trajectory_cache ORDER BY rpe_id")
+        assert cached == [r4]
+        bumped = psql(f"SELECT updated_at > created_at FROM {schema}.axioms")
+        assert bumped == ['t']
+    finally:
+        psql(f'DROP SCHEMA {schema} CASCADE')
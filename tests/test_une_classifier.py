@@ -0,0 +1,124 @@
+import os
+import re
+
+import pytest
+
+import une_classifier
+
+EDGE_FUNCTION = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                             'supabase', 'functions', 'une-detection', 'index.ts')
+
+
+def edge_rules():
+    """(phase, keywords) in precedence order, parsed from classifyUNE()"""
+    with open(EDGE_FUNCTION, 'r', encoding='utf-8') as f:
+        source = f.read()
+    body = source[source.index('function classifyUNE'):]
+    rules = []
+    for condition, phase in re.findall(r"if \((.*?)\) \{\s*return \{\s*phase: '([^']+)'",
+                                       body, re.S):
+        rules.append((phase, re.findall(r"includes\('([^']+)'\)", condition)))
+    return rules
+
+
+class FakeRest:
+    def __init__(self, definitions=(), rpes=()):
+        self.definitions = list(definitions)
+        self.rpes = [dict(r) for r in rpes]
+        self.patches = []
+
+    def select(self, table, params):
+        return self.definitions
+
+    def iter_pages(self, table, columns='*', watermark_column='created_at', since=None,
+                   page_size=1000, filters=None):
+        for i in range(0, len(self.rpes), page_size):
+            yield [dict(r) for r in self.rpes[i:i + page_size]]
+
+    def update(self, table, filters, patch, returning=False):
+        ids = set(filters['id'].removeprefix('in.(').removesuffix(')').split(','))
+        self.patches.append((ids, patch))
+        for row in self.rpes:
+            if row['id'] in ids:
+                row.update(patch)
+
+
+def rpe(i, text, signature):
+    return {'id': f'r{i:03d}', 'name': '', 'core_fracture': text, 'une_signature': signature,
+            'created_at': f't{i:03d}'}
+
+
+def test_default_rules_match_edge_function():
+    assert une_classifier.DEFAULT_RULES == edge_rules()
+
+
+def test_default_rules_agree_with_edge_samples():
+    matcher = une_classifier.UNEMatcher(une_classifier.DEFAULT_RULES)
+    assert une_classifier.parity_mismatches(matcher) == []
+
+
+def test_prose_characteristics_fall_back_to_defaults():
+    # The descriptions une-detection itself returns for each phase
+    client = FakeRest([
+        {'une_phase': 'Pre-UNE',
+         'characteristics': 'Unexamined assumptions, false security, belief in inherent meaning'},
+        {'une_phase': 'UNE-Rupture',
+         'characteristics': 'Ontological crisis, collapse of grounds, total instability'},
+        {'une_phase': 'Echo',
+         'characteristics': 'Full theistic placeholder, meta-recursive transcendence'},
+    ])
+    assert une_classifier.load_rules(client) == une_classifier.DEFAULT_RULES
+
+
+def test_rules_disagreeing_with_edge_samples_are_rejected():
+    client = FakeRest([
+        {'une_phase': 'Pre-UNE', 'characteristics': ['meaning', 'should']},
+        {'une_phase': 'UNE-Rupture', 'characteristics': ['void']},
+        {'une_phase': 'Echo', 'characteristics': {'keywords': ['god']}},
+    ])
+    assert une_classifier.load_rules(client) == une_classifier.DEFAULT_RULES
+
+
+def test_structured_rules_in_parity_are_used():
+    client = FakeRest([
+        {'une_phase': 'Echo', 'characteristics': {'keywords': ['god', 'sacred']}},
+        {'une_phase': 'Pre-UNE', 'characteristics': ['should', 'normal', 'custom']},
+        {'une_phase': 'UNE-Rupture', 'characteristics': ['meaning', 'void', 'absurd']},
+    ])
+    assert une_classifier.load_rules(client) == [
+        ('Pre-UNE', ['should', 'normal', 'custom']),
+        ('UNE-Rupture', ['meaning', 'void', 'absurd']),
+        ('Echo', ['god', 'sacred']),
+    ]
+
+
+def test_reclassify_writes_only_changed_rows():
+    client = FakeRest(rpes=[rpe(0, 'the void', 'UNE-Rupture'), rpe(1, 'god', None),
+                            rpe(2, 'we should', 'Pre-UNE'), rpe(3, 'ground', 'Pre-UNE')])
+    matcher = une_classifier.UNEMatcher(une_classifier.DEFAULT_RULES)
+    scanned, changed, counts = une_classifier.reclassify(client, matcher, page_size=2)
+    assert (scanned, changed) == (4, 2)
+    assert counts == {'Pre-UNE': 1, 'UNE-Rupture': 1, 'Echo': 1, 'Post-UNE': 1}
+    assert {r['id']: r['une_signature'] for r in client.rpes} == {
+        'r000': 'UNE-Rupture', 'r001': 'Echo', 'r002': 'Pre-UNE', 'r003': 'Post-UNE'}
+
+
+def test_reclassify_guard_aborts_before_any_write():
+    # The first pages agree with the stored signatures; only the later ones
+    # push the table-wide ratio over the limit, so a per-page check would
+    # already have written the first pages
+    rows = [rpe(i, 'the void', 'UNE-Rupture') for i in range(60)]
+    rows += [rpe(i, 'ground', 'Echo') for i in range(60, 150)]
+    client = FakeRest(rpes=rows)
+    matcher = une_classifier.UNEMatcher(une_classifier.DEFAULT_RULES)
+    with pytest.raises(ValueError, match='90 of 150'):
+        une_classifier.reclassify(client, matcher, page_size=20, max_change_ratio=0.5)
+    assert client.patches == []
+
+
+def test_reclassify_dry_run_ignores_the_guard():
+    client = FakeRest(rpes=[rpe(i, 'ground', 'Echo') for i in range(10)])
+    matcher = une_classifier.UNEMatcher(une_classifier.DEFAULT_RULES)
+    scanned, changed, _ = une_classifier.reclassify(client, matcher, dry_run=True)
+    assert (scanned, changed) == (10, 10)
+    assert client.patches == []
@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+"""
+Precomputed, incrementally maintained transcendence trajectory cache.
+
+Materializes one document per RPE (the get-rpe-trajectory payload plus all
+trajectories, densification layers and linked axioms) into the
+rpe_trajectory_cache table or a local SQLite file. Each run rebuilds RPEs
+whose row, trajectories, layers or axioms were added since the last
+watermarks (kept in a small JSON state file), and sweeps the cached ids
+against rpes: documents of deleted RPEs are dropped and live RPEs without
+a document are rebuilt.
+
+rpes and axioms are watermarked on updated_at, so edits to them are picked
+up. Trajectories and layers carry no updated_at, and deletes leave no row
+behind, so those changes are not seen through the watermarks. For the table
+the triggers from migration 1762800500 delete the affected documents, which
+the sweep then rebuilds; a SQLite cache needs --full to pick them up.
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import time
+from datetime import datetime, timezone
+
+from metrics import METRICS
+from supabase_rest import DEFAULT_PAGE_SIZE, SupabaseRest
+
+DEFAULT_STATE = 'trajectory_cache.state.json'
+CHUNK = 100
+
+# source table -> (watermark column, column holding the RPE id)
+SOURCES = {
+    'rpes': ('updated_at', 'id'),
+    'transcendence_trajectories': ('created_at', 'rpe_id'),
+    'iterative_densification_layers': ('created_at', 'rpe_id'),
+    'axioms': ('updated_at', 'rpe_id'),
+}
+
+# (stage, position, threshold, intensity multiplier) as in get-rpe-trajectory
+JOURNEY = [
+    ('Fracture', 20, 2, 2),
+    ('Suspension', 40, 4, 2.5),
+    ('Densification', 60, 6, 3),
+    ('Attunement', 80, 8, 4),
+]
+
+
+def journey_stages(rpe):
+    score = float(rpe.get('transcendence_score') or 0)
+    void = float(rpe.get('void_resonance') or 0)
+    stages = [{'stage': 'Void (Groundlessness)', 'position': 0, 'reached': True,
+               'intensity': void}]
+    for stage, position, threshold, factor in JOURNEY:
+        stages.append({'stage': stage, 'position': position, 'reached': score >= threshold,
+                       'intensity': min(score * factor, 10)})
+    stages.append({'stage': 'Theistic Placeholder (Transcendence)', 'position': 100,
+                   'reached': score >= 9, 'intensity': score})
+    return stages
+
+
+def build_document(rpe, trajectories, layers, axioms):
+    return {
+        'rpe': {
+            'id': rpe['id'],
+            'entity_id': rpe.get('entity_id'),
+            'name': rpe.get('name'),
+            'transcendence_score': rpe.get('transcendence_score') or 0,
+            'void_resonance': rpe.get('void_resonance') or 0,
+            'une_signature': rpe.get('une_signature'),
+        },
+        'trajectory': trajectories[0] if trajectories else None,
+        'trajectories': trajectories,
+        'densification_layers': sorted(layers, key=lambda l: l.get('layer_number') or 0),
+        'axioms': sorted(axioms, key=lambda a: a.get('axiom_number') or 0),
+        'journey_stages': journey_stages(rpe),
+    }
+
+
+class TableStore:
+    """Upserts documents into rpe_trajectory_cache"""
+
+    def __init__(self, client):
+        self.client = client
+
+    def write(self, documents):
+        now = datetime.now(timezone.utc).isoformat()
+        rows = [{'rpe_id': rpe_id, 'document': doc, 'refreshed_at': now}
+                for rpe_id, doc in documents.items()]
+        if rows:
+            self.client.insert('rpe_trajectory_cache', rows, upsert=True, on_conflict='rpe_id')
+
+    def delete(self, rpe_ids):
+        if rpe_ids:
+            self.client.delete('rpe_trajectory_cache', {'rpe_id': f"in.({','.join(rpe_ids)})"})
+
+    def ids(self):
+        """Every cached rpe_id, paged by key"""
+        last = None
+        while True:
+            params = {'select': 'rpe_id', 'order': 'rpe_id.asc', 'limit': str(DEFAULT_PAGE_SIZE)}
+            if last is not None:
+                params['rpe_id'] = f'gt.{last}'
+            rows = self.client.select('rpe_trajectory_cache', params)
+            yield from (row['rpe_id'] for row in rows)
+            if len(rows) < DEFAULT_PAGE_SIZE:
+                return
+            last = rows[-1]['rpe_id']
+
+
+class SQLiteStore:
+    """Local cache keyed by rpe_id; get() is a single primary-key lookup"""
+
+    def __init__(self, path):
+        self.conn = sqlite3.connect(path)
+        self.conn.execute('CREATE TABLE IF NOT EXISTS trajectory_cache ('
+                          'rpe_id TEXT PRIMARY KEY, document TEXT NOT NULL, refreshed_at TEXT)')
+
+    def write(self, documents):
+        now = datetime.now(timezone.utc).isoformat()
+        with self.conn:
+            self.conn.executemany(
+                'INSERT OR REPLACE INTO trajectory_cache VALUES (?, ?, ?)',
+                [(rpe_id, json.dumps(doc), now) for rpe_id, doc in documents.items()])
+
+    def delete(self, rpe_ids):
+        with self.conn:
+            self.conn.executemany('DELETE FROM trajectory_cache WHERE rpe_id = ?',
+                                  [(i,) for i in rpe_ids])
+
+    def ids(self):
+        return [row[0] for row in self.conn.execute('SELECT rpe_id FROM trajectory_cache')]
+
+    def get(self, rpe_id):
+        row = self.conn.execute('SELECT document FROM trajectory_cache WHERE rpe_id = ?',
+                                (rpe_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+
+def load_state(path):
+    if os.path.exists(path):
+        with open(path, 'r') as f:
+            return json.load(f)
+    return {}
+
+
+def save_state(path, state):
+    tmp = path + '.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp, path)
+
+
+def find_dirty(client, state):
+    """RPE ids touched since each source's watermark; advances the watermarks"""
+    dirty = set()
+    changed_axioms = set()
+    new_state = dict(state)
+    for table, (column, rpe_column) in SOURCES.items():
+        since = tuple(state[table]) if state.get(table) else None
+        columns = 'id,rpe_id,' + column if rpe_column != 'id' else 'id,' + column
+        for page in client.iter_pages(table, columns=columns, watermark_column=column,
+                                      since=since):
+            dirty.update(row[rpe_column] for row in page if row.get(rpe_column))
+            if table == 'axioms':
+                changed_axioms.update(row['id'] for row in page)
+            last = page[-1]
+            new_state[table] = [last[column], last['id']]
+
+    # Axioms also reach RPEs through transcendence_trajectories.axiom_id
+    changed_axioms = sorted(changed_axioms)
+    for i in range(0, len(changed_axioms), CHUNK):
+        rows = client.select('transcendence_trajectories', {
+            'select': 'rpe_id', 'axiom_id': _in(changed_axioms[i:i + CHUNK])})
+        dirty.update(row['rpe_id'] for row in rows if row.get('rpe_id'))
+    return dirty, new_state
+
+
+def sweep(client, store):
+    """Drop documents of deleted RPEs; returns (live RPEs without a document, removed)"""
+    live = set()
+    for page in client.iter_pages('rpes', columns='id', watermark_column='id'):
+        live.update(row['id'] for row in page)
+    cached = set(store.ids())
+    gone = sorted(cached - live)
+    for i in range(0, len(gone), CHUNK):
+        store.delete(gone[i:i + CHUNK])
+    return live - cached, len(gone)
+
+
+def _in(ids):
+    return f"in.({','.join(ids)})"
+
+
+def _group(rows, key):
+    grouped = {}
+    for row in rows:
+        grouped.setdefault(row.get(key), []).append(row)
+    return grouped
+
+
+def build_documents(client, rpe_ids):
+    """Fetch everything for a chunk of RPEs in four requests and assemble documents"""
+    rpes = client.select('rpes', {'select': '*', 'id': _in(rpe_ids)})
+    trajectories = _group(client.select('transcendence_trajectories', {
+        'select': '*', 'rpe_id': _in(rpe_ids), 'order': 'created_at.asc'}), 'rpe_id')
+    layers = _group(client.select('iterative_densification_layers', {
+        'select': '*', 'rpe_id': _in(rpe_ids)}), 'rpe_id')
+
+    axiom_ids = {t['axiom_id'] for ts in trajectories.values() for t in ts if t.get('axiom_id')}
+    axiom_filter = f"(rpe_id.in.({','.join(rpe_ids)})"
+    if axiom_ids:
+        axiom_filter += f",id.in.({','.join(sorted(axiom_ids))})"
+    axioms = client.select('axioms', {'select': '*', 'or': axiom_filter + ')'})
+    axioms_by_id = {a['id']: a for a in axioms}
+    axioms_by_rpe = _group(axioms, 'rpe_id')
+
+    documents = {}
+    for rpe in rpes:
+        rpe_trajectories = trajectories.get(rpe['id'], [])
+        linked = {a['id']: a for a in axioms_by_rpe.get(rpe['id'], [])}
+        for t in rpe_trajectories:
+            if t.get('axiom_id') in axioms_by_id:
+                linked[t['axiom_id']] = axioms_by_id[t['axiom_id']]
+        documents[rpe['id']] = build_document(rpe, rpe_trajectories,
+                                              layers.get(rpe['id'], []), list(linked.values()))
+    return documents
+
+
+def refresh(client, store, state_path, full=False):
+    state = {} if full else load_state(state_path)
+    with METRICS.span('trajectory_find_dirty'):
+        dirty, new_state = find_dirty(client, state)
+    with METRICS.span('trajectory_sweep'):
+        uncached, removed = sweep(client, store)
+    dirty = sorted(dirty | uncached)
+
+    refreshed = 0
+    for i in range(0, len(dirty), CHUNK):
+        chunk = dirty[i:i + CHUNK]
+        with METRICS.span('trajectory_build_chunk'):
+            documents = build_documents(client, chunk)
+        store.write(documents)
+        # Ids referenced by layers/trajectories whose RPE no longer exists
+        missing = [rpe_id for rpe_id in chunk if rpe_id not in documents]
+        store.delete(missing)
+        refreshed += len(documents)
+        removed += len(missing)
+
+    # Only advance the watermarks once every dirty RPE has been rewritten
+    save_state(state_path, new_state)
+    METRICS.incr('trajectories_refreshed', refreshed)
+    return refreshed, removed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Refresh the per-RPE trajectory cache')
+    parser.add_argument('--sqlite', help='write to a local SQLite file instead of '
+                                         'the rpe_trajectory_cache table')
+    parser.add_argument('--state', default=DEFAULT_STATE, help='watermark state file')
+    parser.add_argument('--full', action='store_true', help='ignore watermarks and rebuild')
+    parser.add_argument('--get', metavar='RPE_ID', help='print a cached document (SQLite only)')
+    args = parser.parse_args(argv)
+
+    if args.get:
+        if not args.sqlite:
+            print("ERROR: --get requires --sqlite", file=sys.stderr)
+            sys.exit(1)
+        print(json.dumps(SQLiteStore(args.sqlite).get(args.get), indent=2))
+        return
+
+    client = SupabaseRest()
+    store = SQLiteStore(args.sqlite) if args.sqlite else TableStore(client)
+
+    started = time.perf_counter()
+    try:
+        refreshed, removed = refresh(client, store, args.state, full=args.full)
+    except Exception as e:
+        print(f"✗ Refresh failed: {e}", file=sys.stderr)
+        sys.exit(1)
+    print(f"✓ Refreshed {refreshed} trajectories, removed {removed} "
+          f"({time.perf_counter() - started:.2f}s)")
+
+
+if __name__ == '__main__':
+    main()
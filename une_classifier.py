@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+Bulk UNE classification over the rpes table.
+
+Rules come from keyword lists in une_definitions.characteristics, falling
+back to the keywords hard-coded in the une-detection edge function whenever
+a phase has none or the rules disagree with that function on its own
+sample inputs. They are compiled into a single regex; each page of RPEs is
+classified with one scan over the page's concatenated text. The whole
+table is classified before anything is written: if the share of
+already-classified rows that would change exceeds --max-change-ratio,
+which usually means the rules are broken, nothing is written. Otherwise
+only rows whose une_signature changes are written back, grouped into one
+PATCH per signature.
+"""
+
+import argparse
+import bisect
+import re
+import sys
+import time
+from datetime import datetime, timezone
+
+from metrics import METRICS
+from supabase_rest import DEFAULT_PAGE_SIZE, SupabaseRest
+
+# Same precedence and keywords as classifyUNE() in une-detection
+DEFAULT_RULES = [
+    ('Pre-UNE', ['should', 'ought', 'normal', 'traditional']),
+    ('UNE-Rupture', ['meaning', 'purpose', 'why', 'absurd', 'nothing', 'void']),
+    ('Echo', ['god', 'divine', 'ultimate', 'absolute', 'transcend']),
+]
+DEFAULT_PHASE = 'Post-UNE'
+PHASE_ORDER = ['Pre-UNE', 'UNE-Rupture', 'Echo', 'Post-UNE']
+UPDATE_CHUNK = 200
+SEPARATOR = '\x00'
+MAX_CHANGE_RATIO = 0.5
+
+# Inputs classifyUNE() in une-detection is known to put in each phase;
+# rules from une_definitions must agree on all of them to be used
+EDGE_SAMPLES = [
+    ('What is the meaning of life', 'UNE-Rupture'),
+    ('The void and the absurd', 'UNE-Rupture'),
+    ('God is dead', 'Echo'),
+    ('We should be normal', 'Pre-UNE'),
+    ('Living without ground', 'Post-UNE'),
+]
+
+
+def _keywords(characteristics):
+    """Keyword strings from a structured characteristics JSONB value.
+
+    Plain strings are descriptive prose ("Unexamined assumptions, false
+    security, ...") rather than triggers, so they yield no keywords.
+    """
+    if isinstance(characteristics, list):
+        return [k for k in characteristics if isinstance(k, str)]
+    if isinstance(characteristics, dict):
+        for key in ('keywords', 'markers', 'indicators', 'triggers'):
+            value = characteristics.get(key)
+            if isinstance(value, list):
+                return [k for k in value if isinstance(k, str)]
+    return []
+
+
+def load_rules(client):
+    """Rules from une_definitions; the edge-function defaults unless every phase has keywords"""
+    rows = client.select('une_definitions', {'select': 'une_phase,characteristics'})
+    keywords_by_phase = {}
+    for row in rows:
+        phase = row.get('une_phase')
+        keywords = [k.strip().lower() for k in _keywords(row.get('characteristics')) if k.strip()]
+        if phase in PHASE_ORDER and phase != DEFAULT_PHASE and keywords:
+            keywords_by_phase.setdefault(phase, []).extend(keywords)
+    missing = [phase for phase, _ in DEFAULT_RULES if phase not in keywords_by_phase]
+    if missing:
+        # A phase without keywords would silently push its rows to Post-UNE
+        print(f"No une_definitions keywords for {', '.join(missing)}; "
+              f"using the edge-function rules", file=sys.stderr)
+        return DEFAULT_RULES
+    rules = [(phase, list(dict.fromkeys(keywords_by_phase[phase])))
+             for phase in PHASE_ORDER if phase in keywords_by_phase]
+    mismatches = parity_mismatches(UNEMatcher(rules))
+    if mismatches:
+        for text, expected, got in mismatches:
+            print(f"  {text!r}: une-detection says {expected}, une_definitions rules say {got}",
+                  file=sys.stderr)
+        print("une_definitions rules disagree with une-detection; using the edge-function rules",
+              file=sys.stderr)
+        return DEFAULT_RULES
+    return rules
+
+
+class UNEMatcher:
+    """One compiled regex over every rule keyword.
+
+    Keywords are matched as substrings (like String.includes) via a
+    zero-width lookahead so overlapping hits are all seen; the winning
+    phase is the highest-precedence rule that hit anywhere in the text.
+    """
+
+    def __init__(self, rules, default=DEFAULT_PHASE):
+        self.phases = [phase for phase, _ in rules] + [default]
+        self.default_rank = len(rules)
+        self.rank_of = {}
+        for rank, (_, keywords) in enumerate(rules):
+            for keyword in keywords:
+                self.rank_of.setdefault(keyword, rank)
+        # Highest precedence first: at any position the regex reports the
+        # best-ranked keyword that matches there
+        alternatives = sorted(self.rank_of, key=lambda k: (self.rank_of[k], -len(k), k))
+        self.pattern = re.compile('(?=(' + '|'.join(map(re.escape, alternatives)) + '))')
+
+    def classify_many(self, texts):
+        """Classify a batch of texts with a single regex scan"""
+        starts = []
+        parts = []
+        position = 0
+        for text in texts:
+            starts.append(position)
+            lowered = (text or '').lower()
+            parts.append(lowered)
+            position += len(lowered) + 1
+
+        ranks = [self.default_rank] * len(starts)
+        for match in self.pattern.finditer(SEPARATOR.join(parts)):
+            row = bisect.bisect_right(starts, match.start()) - 1
+            rank = self.rank_of[match.group(1)]
+            if rank < ranks[row]:
+                ranks[row] = rank
+        return [self.phases[r] for r in ranks]
+
+    def classify(self, text):
+        return self.classify_many([text])[0]
+
+
+def parity_mismatches(matcher):
+    """(text, expected, got) for each EDGE_SAMPLES input the matcher classifies differently"""
+    texts = [text for text, _ in EDGE_SAMPLES]
+    return [(text, expected, got)
+            for (text, expected), got in zip(EDGE_SAMPLES, matcher.classify_many(texts))
+            if got != expected]
+
+
+def rpe_text(row):
+    return f"{row.get('name') or ''} {row.get('core_fracture') or ''}"
+
+
+def write_changes(client, changes):
+    """PATCH rpes grouped by new signature, chunked to keep URLs short"""
+    # Bump updated_at so incremental snapshot exports pick the change up
+    now = datetime.now(timezone.utc).isoformat()
+    by_phase = {}
+    for rpe_id, phase in changes:
+        by_phase.setdefault(phase, []).append(rpe_id)
+    for phase, ids in by_phase.items():
+        for i in range(0, len(ids), UPDATE_CHUNK):
+            chunk = ids[i:i + UPDATE_CHUNK]
+            client.update('rpes', {'id': f"in.({','.join(chunk)})"},
+                          {'une_signature': phase, 'updated_at': now})
+
+
+def reclassify(client, matcher, page_size=DEFAULT_PAGE_SIZE, dry_run=False,
+               max_change_ratio=MAX_CHANGE_RATIO):
+    """Classify every RPE, then write the changes only if the change ratio is in bounds"""
+    scanned = 0
+    # Rows that already had a signature, and how many of those would change
+    classified = reclassified = 0
+    counts = {phase: 0 for phase in PHASE_ORDER}
+    changes = []
+    columns = 'id,name,core_fracture,une_signature,created_at'
+    for page in client.iter_pages('rpes', columns=columns, page_size=page_size):
+        with METRICS.span('une_classify_page'):
+            phases = matcher.classify_many(rpe_text(row) for row in page)
+        for row, phase in zip(page, phases):
+            counts[phase] = counts.get(phase, 0) + 1
+            if row.get('une_signature') is not None:
+                classified += 1
+                reclassified += row['une_signature'] != phase
+            if row.get('une_signature') != phase:
+                changes.append((row['id'], phase))
+        scanned += len(page)
+        METRICS.incr('rows_read', len(page))
+
+    if not dry_run and changes:
+        if classified and reclassified > classified * max_change_ratio:
+            raise ValueError(f"rules would change {reclassified} of {classified} existing "
+                             f"signatures (limit {max_change_ratio:.0%}); check "
+                             f"une_definitions, run with --dry-run or raise --max-change-ratio")
+        with METRICS.span('une_write'):
+            write_changes(client, changes)
+        METRICS.incr('rows_updated', len(changes))
+    return scanned, len(changes), counts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Reclassify rpes.une_signature in bulk')
+    parser.add_argument('--page-size', type=int, default=DEFAULT_PAGE_SIZE)
+    parser.add_argument('--dry-run', action='store_true', help='classify without writing')
+    parser.add_argument('--default-rules', action='store_true',
+                        help='ignore une_definitions and use the edge-function keywords')
+    parser.add_argument('--max-change-ratio', type=float, default=MAX_CHANGE_RATIO,
+                        help='abort before writing if more than this share of existing '
+                             'signatures would change (default %(default)s)')
+    args = parser.parse_args(argv)
+
+    client = SupabaseRest()
+    rules = DEFAULT_RULES if args.default_rules else load_rules(client)
+    matcher = UNEMatcher(rules)
+
+    started = time.perf_counter()
+    try:
+        scanned, changed, counts = reclassify(client, matcher, args.page_size, args.dry_run,
+                                              args.max_change_ratio)
+    except Exception as e:
+        print(f"✗ Reclassification failed: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    verb = 'would change' if args.dry_run else 'updated'
+    print(f"✓ Scanned {scanned} RPEs, {verb} {changed} signatures "
+          f"({time.perf_counter() - started:.2f}s)")
+    for phase in PHASE_ORDER:
+        print(f"  {phase:.<30} {counts.get(phase, 0):>8d}")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,14 +1,15 @@
 #!/usr/bin/env python3
 """Verify file structure"""
 
+import argparse
 import os
 from pathlib import Path
 from collections import defaultdict
 
-def verify_structure():
+def verify_structure(root='.'):
     """Verify the complete file structure"""
     
-    base_path = Path('.')
+    base_path = Path(root)
     
     # Count files by category
     file_counts = defaultdict(int)
@@ -79,5 +80,11 @@ def verify_structure():
     print("✓ EXTRACTION COMPLETE - ALL FILES SUCCESSFULLY CREATED")
     print("=" * 70)
 
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Report the extracted file structure')
+    parser.add_argument('root', nargs='?', default='.')
+    args = parser.parse_args(argv)
+    verify_structure(args.root)
+
 if __name__ == '__main__':
-    verify_structure()
+    main()